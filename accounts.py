@@ -0,0 +1,452 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from alerts import ErrorThrottle
+from api_client import PracticumClient
+from exceptions import NoForSendingInTelegramError
+from homework import (ENDPOINT, RETRY_TIME, TELEGRAM_TOKEN,
+                      PendingDeliveries, check_responses, get_client,
+                      intern_status, make_bot, notify_changes,
+                      send_chat_message)
+from logs import setup_logging
+from metrics import (CYCLE_DURATION, ERRORS, LOOP_LAG, OUTBOX_DEPTH,
+                     POLLS_IN_FLIGHT, POLLS_SCHEDULED, start_http_server)
+from outbox import BufferedOutbox, TelegramOutbox
+from scheduling import (POLL_TICK, AdaptiveInterval, TimingWheel, jittered,
+                        respect_retry_after, spread_offset)
+from shutdown import handle_signals, time_left
+from state import StateStore
+
+logger = logging.getLogger(__name__)
+
+ACCOUNTS_FILE = os.getenv('ACCOUNTS_FILE', 'accounts.json')
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 32))
+
+
+class Account:
+    """Учетная запись: токен Практикума, чаты Telegram и курсор опроса.
+
+    chat_id - чат владельца токена, он получает и статусы, и ошибки.
+    chat_ids - все подписчики учетной записи, им уходят изменения
+    статусов.
+    """
+
+    def __init__(self, name, practicum_token, chat_id,
+                 current_timestamp=None, retry_time=RETRY_TIME):
+        """Создает учетную запись с заголовком авторизации."""
+        self.name = name
+        self.headers = {'Authorization': f'OAuth {practicum_token}'}
+        self.chat_id = chat_id
+        self.chat_ids = (chat_id,)
+        if current_timestamp is None:
+            current_timestamp = int(time.time())
+        self.current_timestamp = current_timestamp
+        self.next_timestamp = None
+        self.statuses = {}
+        self.deliveries = PendingDeliveries()
+        self.errors = ErrorThrottle()
+        self.interval = AdaptiveInterval(retry_time)
+        self.next_poll = time.monotonic()
+
+    def __repr__(self):
+        """Имя учетной записи для логов, без токена."""
+        return f'Account({self.name!r})'
+
+
+def load_accounts(path):
+    """Загружает пары (токен, чат) из JSON-файла."""
+    with open(path, encoding='utf-8') as file:
+        records = json.load(file)
+    if not isinstance(records, list):
+        raise TypeError('Файл учетных записей должен содержать список')
+    accounts = []
+    for index, record in enumerate(records):
+        try:
+            accounts.append(Account(
+                record.get('name', str(index)),
+                record['practicum_token'],
+                record['telegram_chat_id'],
+            ))
+        except KeyError as error:
+            raise KeyError(
+                f'В учетной записи {index} отсутствует ключ {error}'
+            ) from error
+    return accounts
+
+
+def subscriber_chats(chat_id, subscribers):
+    """Чат владельца и чаты подписчиков без повторов."""
+    chats = {str(chat_id): chat_id}
+    for subscriber, _ in subscribers:
+        chats.setdefault(str(subscriber), subscriber)
+    return tuple(chats.values())
+
+
+def restore_accounts(store, accounts):
+    """Восстанавливает курсоры, статусы и подписчиков из хранилища."""
+    for account in accounts:
+        account.chat_ids = subscriber_chats(
+            account.chat_id, store.subscribers(account.name)
+        )
+        current_timestamp, statuses = store.load(account.name)
+        if current_timestamp is not None:
+            account.current_timestamp = current_timestamp
+        account.statuses.update(
+            (key, intern_status(status)) for key, status in statuses.items()
+        )
+        account.errors.restore(store.load_alert(account.name))
+
+
+def save_account(store, account):
+    """Запоминает курсор, статусы и состояние уведомлений об ошибке."""
+    store.save(account.name, account.current_timestamp, account.statuses)
+    store.save_alert(account.name, account.errors.state())
+
+
+def poll_account(client, outbox, account, reserved=False, cache=None):
+    """Выполняет один цикл опроса API для учетной записи.
+
+    Возвращает список работ из ответа API. Неизменившийся ответ клиент
+    возвращает с пустым списком работ, и опрос считается опросом без
+    изменений. Сообщения, которые не удалось доставить в прошлый раз,
+    ставятся в очередь снова.
+    Каждое изменение статуса запрашивается один раз и уходит всем
+    подписчикам учетной записи. Проверенные работы попадают в cache
+    для ответов на команды.
+    """
+    account.deliveries.retry(outbox, account.chat_ids)
+    response = client.get_statuses(
+        account.headers, account.current_timestamp, reserved=reserved
+    )
+    valid, errors = check_responses((response,))
+    if errors:
+        raise errors[0][1]
+    homeworks = valid[0][1]
+    try:
+        notify_changes(
+            outbox, account.deliveries, account.chat_ids, homeworks,
+            account.statuses
+        )
+        account.next_timestamp = response.get('current_date')
+    finally:
+        settle_account(account)
+    client.commit(account.headers)
+    if cache is not None:
+        cache.update(account.name, homeworks)
+    return homeworks
+
+
+def settle_account(account):
+    """Переносит доставленные статусы в кэш и сдвигает курсор, если можно."""
+    if (account.deliveries.settled(account.statuses)
+            and account.next_timestamp is not None):
+        account.current_timestamp = account.next_timestamp
+
+
+def report_error(account, error):
+    """Учитывает ошибку опроса и возвращает текст уведомления или None."""
+    ERRORS.inc(exception=type(error).__name__)
+    if isinstance(error, NoForSendingInTelegramError):
+        logger.error(f'[{account.name}] {error}')
+        return None
+    logger.error(
+        f'[{account.name}] Сбой в работе, '
+        f'требуется исправить ошибку: {error}'
+    )
+    return account.errors.error(error)
+
+
+def poll_account_safely(client, outbox, account, reserved=False,
+                        cache=None):
+    """Опрашивает учетную запись, не выпуская ошибки наружу.
+
+    Возвращает интервал до следующего опроса этой учетной записи:
+    с джиттером, но не раньше, чем разрешил Retry-After.
+    """
+    homeworks = []
+    failure = None
+    started = time.monotonic()
+    try:
+        homeworks = poll_account(client, outbox, account, reserved, cache)
+    except Exception as error:
+        failure = error
+        message = report_error(account, error)
+    else:
+        message = account.errors.resolved()
+    if message:
+        outbox.put(account.chat_id, message)
+    CYCLE_DURATION.observe(time.monotonic() - started)
+    return respect_retry_after(
+        jittered(account.interval.update(homeworks)), failure
+    )
+
+
+def poll_accounts_once(client, outbox, accounts, store,
+                       concurrency=POLL_CONCURRENCY):
+    """Однократно опрашивает все учетные записи и сохраняет курсоры."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for account in accounts:
+            executor.submit(poll_account_safely, client, outbox, account)
+    outbox.flush(timeout=time_left())
+    for account in accounts:
+        settle_account(account)
+        save_account(store, account)
+    store.flush(force=True)
+
+
+class MultiAccountPoller:
+    """Параллельно опрашивает API для множества учетных записей.
+
+    Каждая учетная запись планируется независимо: медленный ответ
+    задерживает только её собственный следующий опрос. Первые опросы
+    равномерно разнесены по окну spread, следующие планируются с
+    джиттером через колесо таймеров, поэтому поток запросов ровный.
+    Если общий бюджет запросов к API исчерпан, наступившие опросы ждут
+    в очереди, а не завершаются ошибкой. Набор учетных записей можно
+    заменить на ходу через assign(). Если передан cache, в него попадают
+    проверенные ответы для команд /status и /history. Функция on_release
+    получает имена снятых с опроса учетных записей, когда их состояние
+    уже записано на диск и новый владелец может их забрать.
+    """
+
+    def __init__(self, outbox, accounts, concurrency=POLL_CONCURRENCY,
+                 client=None, store=None, spread=RETRY_TIME, tick=POLL_TICK,
+                 cache=None, on_release=None):
+        """Планирует первые опросы учетных записей по окну spread."""
+        self.client = client or get_client()
+        self.store = store
+        self.cache = cache
+        self.on_release = on_release
+        self.outbox = outbox
+        self.accounts = accounts
+        self.concurrency = concurrency
+        self.spread = spread
+        self.stopped = threading.Event()
+        self._assignments = queue.SimpleQueue()
+        self._detached = set()
+        self._ready = deque()
+        self._budget_wait = 0.0
+        self._wheel = TimingWheel(tick=tick)
+        for index, account in enumerate(accounts):
+            offset = spread_offset(index, len(accounts), spread)
+            self._schedule(account, offset)
+
+    def _schedule(self, account, delay):
+        account.next_poll = time.monotonic() + delay
+        self._wheel.schedule(account, delay)
+
+    def _submit_due(self, executor, in_flight):
+        """Отправляет в работу учетные записи, время опроса которых пришло."""
+        now = time.monotonic()
+        self._ready.extend(self._wheel.advance(now))
+        self._budget_wait = 0.0
+        while self._ready and len(in_flight) < self.concurrency:
+            self._budget_wait = self.client.budget.reserve()
+            if self._budget_wait:
+                break
+            account = self._ready.popleft()
+            LOOP_LAG.observe(max(0.0, now - account.next_poll))
+            future = executor.submit(
+                poll_account_safely, self.client, self.outbox, account, True,
+                self.cache
+            )
+            in_flight[future] = account
+
+    def _timeout(self):
+        """Время до следующего такта колеса или до места в бюджете."""
+        timeout = self._wheel.time_to_next_tick(time.monotonic())
+        if self._budget_wait:
+            timeout = min(timeout, self._budget_wait)
+        return timeout
+
+    def stop(self):
+        """Просит цикл опроса завершиться."""
+        self.stopped.set()
+
+    def assign(self, accounts):
+        """Просит цикл опроса перейти на новый набор учетных записей.
+
+        Можно вызывать из любого потока: изменения применяет сам цикл.
+        Курсоры новых учетных записей восстанавливаются из хранилища.
+        """
+        self._assignments.put(list(accounts))
+
+    def _apply_assignments(self, in_flight):
+        while not self._assignments.empty():
+            accounts = self._assignments.get()
+            kept = set(accounts)
+            busy = set(in_flight.values())
+            released = [
+                account.name for account in self.accounts
+                if account not in kept and self._detach(account, busy)
+            ]
+            current = set(self.accounts)
+            added = [account for account in accounts if account not in current]
+            if self.store is not None:
+                self.store.flush(force=True)
+                restore_accounts(self.store, added)
+            self._release(released)
+            for index, account in enumerate(added):
+                self._detached.discard(account)
+                offset = spread_offset(index, len(added), self.spread)
+                self._schedule(account, offset)
+            self.accounts = accounts
+            logger.info(
+                f'Учетных записей в опросе: {len(accounts)}, '
+                f'добавлено: {len(added)}'
+            )
+
+    def _detach(self, account, busy):
+        """Снимает учетную запись с опроса, сохраняя её состояние.
+
+        Возвращает True, если учетную запись можно отдавать сразу. Если
+        её опрос еще идет, она отдается только после того, как результат
+        опроса записан на диск, чтобы новый владелец не восстановил
+        устаревший курсор.
+        """
+        self._wheel.cancel(account)
+        if account in self._ready:
+            self._ready.remove(account)
+        settle_account(account)
+        self._save(account)
+        if account in busy:
+            self._detached.add(account)
+            return False
+        return True
+
+    def _release(self, names):
+        """Сообщает, что учетные записи сохранены и их можно забирать."""
+        if names and self.on_release is not None:
+            self.on_release(names)
+
+    def run(self):
+        """Основной цикл многопользовательского опроса до вызова stop()."""
+        in_flight = {}
+        POLLS_IN_FLIGHT.set_function(lambda: len(in_flight))
+        POLLS_SCHEDULED.set_function(
+            lambda: len(self._wheel) + len(self._ready)
+        )
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not self.stopped.is_set():
+                self._apply_assignments(in_flight)
+                self._submit_due(executor, in_flight)
+                if not in_flight:
+                    self.stopped.wait(self._timeout())
+                    continue
+                timeout = None
+                if len(in_flight) < self.concurrency:
+                    timeout = self._timeout()
+                done, _ = wait(
+                    in_flight, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                released = []
+                for future in done:
+                    account = in_flight.pop(future)
+                    if account in self._detached:
+                        self._detached.discard(account)
+                        settle_account(account)
+                        released.append(account.name)
+                    else:
+                        self._schedule(account, future.result())
+                    self._save(account)
+                if self.store is not None:
+                    self.store.flush(force=bool(released))
+                self._release(released)
+        self.outbox.flush(timeout=time_left())
+        for account in set(self.accounts) | set(in_flight.values()):
+            settle_account(account)
+            self._save(account)
+        if self.store is not None:
+            self.store.flush(force=True)
+
+    def _save(self, account):
+        """Запоминает курсор и статусы учетной записи в хранилище."""
+        if self.store is not None:
+            save_account(self.store, account)
+
+
+def start_commands(outbox, client, accounts):
+    """Запускает ответы на команды для владельцев и подписчиков.
+
+    Возвращает кэш ответов API и слушателя команд или (None, None).
+    """
+    from commands import (COMMANDS_ENABLED, CommandHandler, CommandListener,
+                          ResponseCache)
+
+    if not COMMANDS_ENABLED:
+        return None, None
+    by_name = {account.name: account for account in accounts}
+    by_chat = {}
+    for account in accounts:
+        for chat_id in account.chat_ids:
+            by_chat.setdefault(str(chat_id), []).append(account.name)
+    cache = ResponseCache()
+    handler = CommandHandler(
+        cache,
+        fetch=lambda name: client.get_statuses(
+            by_name[name].headers, 0, conditional=False
+        ),
+        accounts_for=lambda chat_id: by_chat.get(str(chat_id), []),
+    )
+    listener = CommandListener(make_bot(), handler, outbox).start()
+    return cache, listener
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Опрос API для учетных записей из файла'
+    )
+    parser.add_argument(
+        '--once', action='store_true',
+        help='Опросить все учетные записи один раз и завершиться'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Запускает опрос API для всех учетных записей из файла."""
+    args = parse_args(argv)
+    setup_logging()
+    if not TELEGRAM_TOKEN:
+        logger.critical('Работа программы приостановлена: нет TELEGRAM_TOKEN')
+        sys.exit(1)
+    accounts = load_accounts(ACCOUNTS_FILE)
+    if not accounts:
+        logger.critical('Работа программы приостановлена: нет учетных записей')
+        sys.exit(1)
+    logger.info(f'Загружено учетных записей: {len(accounts)}')
+    store = StateStore()
+    restore_accounts(store, accounts)
+    client = PracticumClient(ENDPOINT, pool_size=POLL_CONCURRENCY)
+    if args.once:
+        outbox = BufferedOutbox(make_bot, send_chat_message)
+        poll_accounts_once(client, outbox, accounts, store)
+    else:
+        outbox = TelegramOutbox(make_bot(), send_chat_message).start()
+        OUTBOX_DEPTH.set_function(outbox.qsize)
+        start_http_server()
+        cache, listener = start_commands(outbox, client, accounts)
+        poller = MultiAccountPoller(
+            outbox, accounts, client=client, store=store, cache=cache
+        )
+        handle_signals(poller.stop)
+        poller.run()
+        if listener is not None:
+            listener.stop(timeout=time_left())
+    outbox.close(timeout=time_left())
+    store.close()
+    client.close()
+    logger.info('Работа бота завершена')
+
+
+if __name__ == '__main__':
+    main()
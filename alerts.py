@@ -0,0 +1,77 @@
+import os
+
+from clock import SYSTEM_CLOCK
+
+ERROR_SUPPRESS_WINDOW = float(os.getenv('ERROR_SUPPRESS_WINDOW', 600))
+ERROR_MAX_SUPPRESS_WINDOW = float(
+    os.getenv('ERROR_MAX_SUPPRESS_WINDOW', 6 * 60 * 60)
+)
+ERROR_BACKOFF_FACTOR = float(os.getenv('ERROR_BACKOFF_FACTOR', 2))
+
+
+class ErrorThrottle:
+    """Подавляет повторные уведомления об одной и той же ошибке.
+
+    Ошибка определяется типом исключения и его текстом. О новой ошибке
+    сообщается сразу, повторы подавляются в течение окна, которое растет
+    экспоненциально после каждого повторного уведомления. Когда ошибка
+    перестает возникать, отправляется одно сообщение о восстановлении.
+
+    Окно отсчитывается по времени Unix, поэтому состояние из state()
+    можно сохранить и восстановить через restore() в следующем запуске:
+    разовые запуски по расписанию тоже не повторяют одно уведомление.
+    """
+
+    def __init__(self, window=ERROR_SUPPRESS_WINDOW,
+                 max_window=ERROR_MAX_SUPPRESS_WINDOW,
+                 backoff_factor=ERROR_BACKOFF_FACTOR, clock=SYSTEM_CLOCK):
+        """Настраивает окно подавления и его рост."""
+        self.clock = clock
+        self.base_window = window
+        self.max_window = max_window
+        self.backoff_factor = backoff_factor
+        self.fingerprint = None
+        self.window = window
+        self.next_report = 0.0
+        self.suppressed = 0
+
+    def error(self, error):
+        """Возвращает текст уведомления об ошибке или None для повтора."""
+        fingerprint = (type(error).__name__, str(error))
+        now = self.clock.time()
+        message = f'Сбой в работе, требуется исправить ошибку: {error}'
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.window = self.base_window
+            self.next_report = now + self.window
+            self.suppressed = 0
+            return message
+        if now < self.next_report:
+            self.suppressed += 1
+            return None
+        repeats = self.suppressed + 1
+        self.suppressed = 0
+        self.window = min(self.window * self.backoff_factor, self.max_window)
+        self.next_report = now + self.window
+        return f'{message} (повторилась еще {repeats} раз)'
+
+    def resolved(self):
+        """Возвращает сообщение о восстановлении, если ошибка была."""
+        if self.fingerprint is None:
+            return None
+        self.fingerprint = None
+        return 'Работа восстановлена, ошибка больше не возникает'
+
+    def state(self):
+        """Состояние для сохранения или None, если ошибки нет."""
+        if self.fingerprint is None:
+            return None
+        return (*self.fingerprint, self.window, self.next_report,
+                self.suppressed)
+
+    def restore(self, state):
+        """Восстанавливает состояние, сохраненное state()."""
+        if state is None:
+            return
+        kind, text, self.window, self.next_report, self.suppressed = state
+        self.fingerprint = (kind, text)
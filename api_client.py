@@ -0,0 +1,470 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from exceptions import (CircuitOpenError, NegativStatusCodeError,
+                        RateLimitedError)
+from metrics import API_LATENCY, API_UNCHANGED
+from outbox import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 10))
+API_RETRIES = int(os.getenv('API_RETRIES', 2))
+API_BACKOFF_FACTOR = float(os.getenv('API_BACKOFF_FACTOR', 0.5))
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 5))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 15))
+API_CYCLE_BUDGET = float(os.getenv('API_CYCLE_BUDGET', 30))
+API_HEDGE = os.getenv('API_HEDGE', '0') == '1'
+API_HEDGE_PERCENTILE = float(os.getenv('API_HEDGE_PERCENTILE', 95))
+API_HEDGE_MIN_SAMPLES = 20
+API_RATE_LIMIT = float(os.getenv('API_RATE_LIMIT', 10))
+API_RATE_BURST = float(os.getenv('API_RATE_BURST', 0)) or None
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', 60))
+
+
+CachedResponse = namedtuple(
+    'CachedResponse', 'params etag last_modified fingerprint unchanged'
+)
+
+RETRY_LATER_STATUSES = (
+    HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE
+)
+
+
+class UnchangedResponse(dict):
+    """Ответ API, совпавший с предыдущим ответом учетной записи.
+
+    Вместо повторно декодированных работ содержит пустой список: все
+    они уже были обработаны, когда ответ пришел впервые.
+    """
+
+    unchanged = True
+
+    def __init__(self, current_date):
+        """Создает ответ без работ с отметкой current_date."""
+        super().__init__(homeworks=[], current_date=current_date)
+
+
+def parse_retry_after(value):
+    """Переводит заголовок Retry-After в секунды ожидания или None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RequestBudget:
+    """Общий для процесса лимит запросов к API в секунду.
+
+    Поверх TokenBucket добавляет блокировку, чтобы бюджет можно было
+    делить между потоками. rate=0 отключает ограничение частоты, но
+    не паузы: pause() закрывает бюджет для всех, пока не истечет
+    Retry-After.
+    """
+
+    def __init__(self, rate=API_RATE_LIMIT, capacity=API_RATE_BURST):
+        """Создает бюджет; rate=0 отключает ограничение частоты."""
+        self._bucket = TokenBucket(rate, capacity) if rate else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Не выдает права на запросы ближайшие seconds секунд."""
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + seconds
+            )
+
+    def reserve(self):
+        """Забирает право на запрос или возвращает время до его появления."""
+        with self._lock:
+            paused = self._paused_until - time.monotonic()
+            if paused > 0:
+                return paused
+            if self._bucket is None:
+                return 0.0
+            wait = self._bucket.wait_time()
+            if not wait:
+                self._bucket.consume()
+            return wait
+
+    def acquire(self):
+        """Ждет, пока в бюджете появится право на запрос, и забирает его."""
+        wait = self.reserve()
+        while wait:
+            time.sleep(wait)
+            wait = self.reserve()
+
+
+class CircuitBreaker:
+    """Предохранитель перед API: закрыт, открыт или полуоткрыт.
+
+    После failure_threshold сбоев подряд предохранитель открывается, и
+    запросы сразу завершаются ошибкой CircuitOpenError с текстом
+    последнего сбоя. Через recovery_timeout секунд пропускается один
+    пробный запрос: успех закрывает предохранитель, сбой снова открывает.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT):
+        """Создает закрытый предохранитель."""
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Пропускает запрос или выбрасывает CircuitOpenError."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if (self.state == self.OPEN and time.monotonic()
+                    - self.opened_at >= self.recovery_timeout):
+                self.state = self.HALF_OPEN
+                logger.info('Пробный запрос к API после сбоев')
+                return
+        raise CircuitOpenError(
+            f'API временно недоступно: {self.last_error}'
+        )
+
+    def record_success(self):
+        """Отмечает ответ сервера и закрывает предохранитель."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info('API снова доступно')
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self, error):
+        """Отмечает сбой сервера, при необходимости открывая предохранитель."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if (self.state == self.HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    logger.error(
+                        f'Запросы к API приостановлены после сбоев: {error}'
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Скользящее окно задержек последних запросов."""
+
+    def __init__(self, size=200):
+        """Хранит не больше size последних замеров."""
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        """Добавляет задержку запроса в окно."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent, min_samples=API_HEDGE_MIN_SAMPLES):
+        """Возвращает перцентиль задержки или None, если данных мало."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            samples = sorted(self._samples)
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+
+class PracticumClient:
+    """Клиент API Практикума с пулом keep-alive соединений.
+
+    Сессия переиспользует TCP/TLS соединения между опросами. При сбое
+    соединения или таймауте клиент сам повторяет запрос до retries раз,
+    пока укладывается в бюджет времени опроса. Ответы с кодом, отличным
+    от 200, не повторяются и обрабатываются вызывающим кодом. Сбои
+    соединения и ответы 5xx учитываются общим предохранителем, чтобы
+    при недоступности API не засыпать его запросами от всех учетных
+    записей.
+
+    Каждая попытка ограничена таймаутами соединения и чтения, а весь
+    опрос учетной записи вместе с повторами - бюджетом времени
+    cycle_budget. В режиме hedge, если
+    ответ не пришел за время перцентиля задержки hedge_percentile,
+    отправляется второй такой же запрос и берется первый ответ.
+
+    Все запросы клиента, включая повторы и дубли, расходуют общий бюджет
+    budget. Ответы 429 и 503 превращаются в RateLimitedError со временем
+    из заголовка Retry-After и приостанавливают весь бюджет на это
+    время, чтобы остальные учетные записи тоже не обращались к API.
+
+    Клиент просит сжатый ответ и запоминает для каждой учетной записи
+    только заголовки ETag и Last-Modified и отпечаток тела последнего
+    ответа, но не сам ответ. Повторный запрос с тем же курсором
+    отправляется с условными заголовками, а ответ 304 или тело с
+    прежним отпечатком возвращают UnchangedResponse без разбора JSON.
+    """
+
+    def __init__(self, endpoint, pool_size=API_POOL_SIZE,
+                 retries=API_RETRIES, backoff_factor=API_BACKOFF_FACTOR,
+                 keep_alive=True, breaker=None,
+                 connect_timeout=API_CONNECT_TIMEOUT,
+                 read_timeout=API_READ_TIMEOUT, cycle_budget=API_CYCLE_BUDGET,
+                 hedge=API_HEDGE, hedge_percentile=API_HEDGE_PERCENTILE,
+                 budget=None):
+        """Создает сессию с пулом соединений и настройками запросов."""
+        self.endpoint = endpoint
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget or RequestBudget()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.cycle_budget = cycle_budget
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.hedge_percentile = hedge_percentile
+        self.latency = LatencyTracker()
+        self._responses = {}
+        self._candidates = {}
+        self._executor = None
+        if hedge:
+            self._executor = ThreadPoolExecutor(
+                max_workers=pool_size, thread_name_prefix='hedge'
+            )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=0, raise_on_status=False),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def get_statuses(self, headers, current_timestamp, deadline=None,
+                     reserved=False, conditional=True):
+        """Запрашивает статусы домашних работ начиная с current_timestamp.
+
+        deadline - момент time.monotonic(), к которому нужно уложиться;
+        по умолчанию отсчитывается cycle_budget от начала запроса.
+        reserved - право на запрос уже взято из бюджета планировщиком,
+        иначе запрос ждет свободного места в бюджете.
+        conditional - использовать и обновлять состояние условных запросов
+        учетной записи; разовые запросы вроде полной истории для команд
+        идут без него, чтобы не сбивать ETag и отпечаток цикла опроса.
+        """
+        params = {'from_date': current_timestamp}
+        self.breaker.before_request()
+        if not reserved:
+            self.budget.acquire()
+        if deadline is None:
+            deadline = time.monotonic() + self.cycle_budget
+        key = headers.get('Authorization')
+        cached = self._responses.get(key) if conditional else None
+        request_headers = self._conditional_headers(headers, params, cached)
+        started = time.monotonic()
+        try:
+            if self._executor is None:
+                homework_statuses = self._get(
+                    request_headers, params, deadline
+                )
+            else:
+                homework_statuses = self._hedged_get(
+                    request_headers, params, deadline
+                )
+            status_code = homework_statuses.status_code
+            self._record_status(status_code)
+            if status_code in RETRY_LATER_STATUSES:
+                raise self._rate_limited(homework_statuses)
+            if status_code == HTTPStatus.NOT_MODIFIED and cached:
+                API_UNCHANGED.inc(reason='not_modified')
+                return cached.unchanged
+            if status_code != HTTPStatus.OK:
+                raise NegativStatusCodeError(
+                    'Запрос выполнен безуспешно: '
+                    f'статус ответа {status_code}'
+                )
+            logger.info('Запрос к эндпоинту API-сервиса прошел успешно')
+            if not conditional:
+                return homework_statuses.json()
+            return self._decode(key, params, homework_statuses, cached)
+        except (requests.exceptions.RequestException,
+                FutureTimeoutError) as error:
+            self.breaker.record_failure(error)
+            raise ConnectionError(
+                f'Произошла ошибка при запросе к серверу: {error}'
+            )
+        finally:
+            API_LATENCY.observe(time.monotonic() - started)
+
+    def _record_status(self, status_code):
+        """Сообщает размыкателю цепи об исходе запроса."""
+        if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            self.breaker.record_failure(NegativStatusCodeError(
+                f'статус ответа {status_code}'
+            ))
+        else:
+            self.breaker.record_success()
+
+    def _rate_limited(self, response):
+        """Приостанавливает бюджет по Retry-After и возвращает ошибку."""
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after:
+            self.budget.pause(retry_after)
+        return RateLimitedError(
+            f'API просит повторить запрос позже: статус ответа '
+            f'{response.status_code}, Retry-After {retry_after}',
+            retry_after
+        )
+
+    @staticmethod
+    def _conditional_headers(headers, params, cached):
+        """Добавляет условные заголовки, если курсор не сдвинулся."""
+        if cached is None or cached.params != params:
+            return headers
+        conditional = dict(headers)
+        if cached.etag:
+            conditional['If-None-Match'] = cached.etag
+        if cached.last_modified:
+            conditional['If-Modified-Since'] = cached.last_modified
+        return conditional
+
+    def _decode(self, key, params, response, cached):
+        """Декодирует тело ответа, если оно изменилось с прошлого раза."""
+        body = getattr(response, 'content', None)
+        if not isinstance(body, bytes):
+            return response.json()
+        fingerprint = hashlib.blake2b(body, digest_size=16).digest()
+        if cached is not None and cached.fingerprint == fingerprint:
+            API_UNCHANGED.inc(reason='same_body')
+            data = unchanged = cached.unchanged
+        else:
+            data = response.json()
+            unchanged = UnchangedResponse(
+                data.get('current_date') if isinstance(data, dict) else None
+            )
+        self._candidates[key] = CachedResponse(
+            params, response.headers.get('ETag'),
+            response.headers.get('Last-Modified'), fingerprint, unchanged
+        )
+        return data
+
+    def commit(self, headers):
+        """Отмечает последний ответ учетной записи как обработанный.
+
+        Только после этого ответ с тем же телом или 304 возвращается как
+        UnchangedResponse. Если обработка ответа не удалась, тот же ответ
+        в следующий раз будет разобран заново.
+        """
+        key = headers.get('Authorization')
+        candidate = self._candidates.pop(key, None)
+        if candidate is not None:
+            self._responses[key] = candidate
+
+    def _get(self, headers, params, deadline):
+        """Выполняет запрос, повторяя его при сбоях соединения до deadline."""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._charge(deadline)
+            try:
+                return self._attempt(headers, params, deadline)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as error:
+                pause = self.backoff_factor * 2 ** attempt
+                if (attempt == self.retries
+                        or time.monotonic() + pause >= deadline):
+                    raise
+                logger.info(f'Повтор запроса к API после сбоя: {error}')
+                time.sleep(pause)
+
+    def _charge(self, deadline):
+        """Забирает из бюджета право на дополнительный запрос до deadline."""
+        wait = self.budget.reserve()
+        while wait:
+            if time.monotonic() + wait >= deadline:
+                raise requests.exceptions.Timeout(
+                    'Бюджет запросов не позволяет повторить запрос вовремя'
+                )
+            time.sleep(wait)
+            wait = self.budget.reserve()
+
+    def _attempt(self, headers, params, deadline):
+        """Выполняет одну попытку с учетом оставшегося бюджета времени."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout(
+                'Исчерпан бюджет времени на запрос'
+            )
+        started = time.monotonic()
+        response = self.session.get(
+            self.endpoint,
+            headers=headers,
+            params=params,
+            timeout=(
+                min(self.connect_timeout, remaining),
+                min(self.read_timeout, remaining),
+            )
+        )
+        self.latency.add(time.monotonic() - started)
+        return response
+
+    def _hedged_get(self, headers, params, deadline):
+        """Дублирует медленный запрос и возвращает первый успешный ответ."""
+        first = self._executor.submit(self._get, headers, params, deadline)
+        threshold = self.latency.percentile(self.hedge_percentile)
+        remaining = deadline - time.monotonic()
+        if threshold is None or threshold >= remaining:
+            return first.result(timeout=max(remaining, 0))
+        try:
+            return first.result(timeout=threshold)
+        except FutureTimeoutError:
+            pass
+        if self.budget.reserve():
+            return first.result(timeout=max(deadline - time.monotonic(), 0))
+        logger.info('Ответ API задерживается, отправлен повторный запрос')
+        second = self._executor.submit(self._get, headers, params, deadline)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=max(deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED
+            )
+            if not done:
+                raise FutureTimeoutError('Исчерпан бюджет времени на запрос')
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        return first.result()
+
+    def close(self):
+        """Закрывает соединения пула."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.session.close()
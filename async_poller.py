@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from http import HTTPStatus
+
+import aiohttp
+
+from accounts import (ACCOUNTS_FILE, load_accounts, report_error,
+                      restore_accounts, save_account)
+from api_client import (API_CONNECT_TIMEOUT, API_CYCLE_BUDGET,
+                        API_READ_TIMEOUT, RETRY_LATER_STATUSES, CircuitBreaker,
+                        RequestBudget, parse_retry_after)
+from exceptions import (NegativeSendMessageError, NegativStatusCodeError,
+                        RateLimitedError)
+from homework import (ENDPOINT, RETRY_TIME, TELEGRAM_TOKEN, check_responses,
+                      split_changes)
+from logs import setup_logging
+from metrics import (API_LATENCY, CYCLE_DURATION, SEND_LATENCY,
+                     start_http_server)
+from outbox import TELEGRAM_CHAT_RATE, TELEGRAM_GLOBAL_RATE, TokenBucket
+from scheduling import jittered, respect_retry_after, spread_offset
+from shutdown import SHUTDOWN_SIGNALS
+from state import StateStore
+
+logger = logging.getLogger(__name__)
+
+ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 500))
+TELEGRAM_API_URL = 'https://api.telegram.org/bot'
+
+
+async def get_api_answer_async(session, headers, current_timestamp,
+                               endpoint=ENDPOINT, breaker=None, budget=None):
+    """Асинхронно делает запрос к эндпоинту API-сервиса.
+
+    Ответ 429 или 503 приостанавливает общий бюджет запросов budget
+    на время из Retry-After.
+    """
+    params = {'from_date': current_timestamp}
+    if breaker is not None:
+        breaker.before_request()
+    started = time.monotonic()
+    try:
+        async with session.get(
+            endpoint, headers=headers, params=params
+        ) as response:
+            if breaker is not None:
+                if response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                    breaker.record_failure(NegativStatusCodeError(
+                        f'статус ответа {response.status}'
+                    ))
+                else:
+                    breaker.record_success()
+            if response.status in RETRY_LATER_STATUSES:
+                retry_after = parse_retry_after(
+                    response.headers.get('Retry-After')
+                )
+                if retry_after and budget is not None:
+                    budget.pause(retry_after)
+                raise RateLimitedError(
+                    f'API просит повторить запрос позже: статус ответа '
+                    f'{response.status}, Retry-After {retry_after}',
+                    retry_after
+                )
+            if response.status != HTTPStatus.OK:
+                raise NegativStatusCodeError(
+                    'Запрос выполнен безуспешно: '
+                    f'статус ответа {response.status}'
+                )
+            logger.info('Запрос к эндпоинту API-сервиса прошел успешно')
+            return await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        if breaker is not None:
+            breaker.record_failure(error)
+        raise ConnectionError(
+            f'Произошла ошибка при запросе к серверу: {error!r}'
+        )
+    finally:
+        API_LATENCY.observe(time.monotonic() - started)
+
+
+async def send_message_async(session, token, chat_id, message,
+                             api_url=TELEGRAM_API_URL):
+    """Асинхронно отправляет сообщение в Telegram чат."""
+    started = time.monotonic()
+    try:
+        async with session.post(
+            f'{api_url}{token}/sendMessage',
+            json={'chat_id': chat_id, 'text': message}
+        ) as response:
+            result = await response.json(content_type=None)
+        if not result.get('ok'):
+            raise NegativeSendMessageError(
+                'Произошла ошибка при отправке сообщения: '
+                f'{result.get("description")}'
+            )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise NegativeSendMessageError(
+            'Произошла ошибка при отправке сообщения'
+        ) from error
+    else:
+        logger.info('Отправлено сообщение: %s', message)
+    finally:
+        SEND_LATENCY.observe(time.monotonic() - started)
+
+
+class AsyncPoller:
+    """Опрашивает API для множества учетных записей в одном event loop.
+
+    Каждая учетная запись - отдельная корутина, число одновременных
+    опросов ограничено семафором, поэтому тысячи почти всегда спящих
+    учетных записей обходятся без отдельных потоков.
+    """
+
+    def __init__(self, accounts, token, concurrency=ASYNC_CONCURRENCY,
+                 endpoint=ENDPOINT, telegram_url=TELEGRAM_API_URL,
+                 breaker=None, store=None, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE, spread=RETRY_TIME,
+                 budget=None):
+        """Настраивает лимиты; корутины создаются в run()."""
+        self.accounts = accounts
+        self.token = token
+        self.concurrency = concurrency
+        self.endpoint = endpoint
+        self.telegram_url = telegram_url
+        self.breaker = breaker or CircuitBreaker()
+        self.budget = budget or RequestBudget()
+        self.store = store
+        self.chat_rate = chat_rate
+        self.spread = spread
+        self._global = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        self._stopped = None
+        self._semaphore = None
+
+    def stop(self):
+        """Просит все корутины опроса завершиться."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def run(self):
+        """Опрашивает учетные записи до вызова stop()."""
+        self._stopped = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        timeout = aiohttp.ClientTimeout(
+            total=API_CYCLE_BUDGET,
+            sock_connect=API_CONNECT_TIMEOUT,
+            sock_read=API_READ_TIMEOUT,
+        )
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout
+        ) as session:
+            await asyncio.gather(*(
+                self._run_account(
+                    session, account,
+                    spread_offset(index, len(self.accounts), self.spread)
+                )
+                for index, account in enumerate(self.accounts)
+            ))
+        if self.store is not None:
+            self.store.flush(force=True)
+
+    async def _wait(self, delay):
+        """Ждет delay секунд или вызова stop()."""
+        try:
+            await asyncio.wait_for(self._stopped.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_account(self, session, account, offset):
+        await self._wait(offset)
+        while not self._stopped.is_set():
+            async with self._semaphore:
+                delay = await self.poll_account_safely(session, account)
+            if self.store is not None:
+                save_account(self.store, account)
+                self.store.flush()
+            await self._wait(delay)
+
+    async def poll_account(self, session, account):
+        """Выполняет один цикл опроса API для учетной записи."""
+        wait = self.budget.reserve()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.budget.reserve()
+        response = await get_api_answer_async(
+            session, account.headers, account.current_timestamp,
+            self.endpoint, self.breaker, self.budget
+        )
+        valid, errors = check_responses((response,))
+        if errors:
+            raise errors[0][1]
+        homeworks = valid[0][1]
+        changes, errors = split_changes(homeworks, account.statuses)
+        for key, status, message in changes:
+            await self.fan_out(session, account, message)
+            account.statuses[key] = status
+        if errors:
+            raise errors[0]
+        account.current_timestamp = response.get('current_date')
+        return homeworks
+
+    async def poll_account_safely(self, session, account):
+        """Опрашивает учетную запись и возвращает интервал до следующего."""
+        homeworks = []
+        failure = None
+        started = time.monotonic()
+        try:
+            homeworks = await self.poll_account(session, account)
+        except Exception as error:
+            failure = error
+            message = report_error(account, error)
+        else:
+            message = account.errors.resolved()
+        if message:
+            try:
+                await self.send(session, account.chat_id, message)
+            except NegativeSendMessageError as error:
+                logger.error(
+                    f'[{account.name}] Сбой в отправке сообщения: {error}'
+                )
+        CYCLE_DURATION.observe(time.monotonic() - started)
+        return respect_retry_after(
+            jittered(account.interval.update(homeworks)), failure
+        )
+
+    async def fan_out(self, session, account, message):
+        """Отправляет сообщение всем подписчикам учетной записи.
+
+        Сначала сообщение уходит владельцу: сбой пробрасывается до
+        отправки подписчикам, чтобы статус был отправлен повторно при
+        следующем опросе и подписчики не получили его дважды. Подписчикам
+        сообщение уходит параллельно, их сбои только логируются.
+        """
+        await self.send(session, account.chat_id, message)
+        subscribers = account.chat_ids[1:]
+        results = await asyncio.gather(
+            *(self.send(session, chat_id, message)
+              for chat_id in subscribers),
+            return_exceptions=True
+        )
+        for chat_id, result in zip(subscribers, results):
+            if not isinstance(result, Exception):
+                continue
+            logger.error(
+                f'[{account.name}] Сбой в отправке подписчику '
+                f'{chat_id}: {result}'
+            )
+
+    async def send(self, session, chat_id, message):
+        """Отправляет сообщение с учетом лимитов Telegram."""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate
+            )
+        for limiter in (bucket, self._global):
+            wait = limiter.wait_time()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = limiter.wait_time()
+            limiter.consume()
+        await send_message_async(
+            session, self.token, chat_id, message, self.telegram_url
+        )
+
+
+def main():
+    """Запускает асинхронный опрос API для учетных записей из файла."""
+    setup_logging()
+    if not TELEGRAM_TOKEN:
+        logger.critical('Работа программы приостановлена: нет TELEGRAM_TOKEN')
+        sys.exit(1)
+    accounts = load_accounts(ACCOUNTS_FILE)
+    if not accounts:
+        logger.critical('Работа программы приостановлена: нет учетных записей')
+        sys.exit(1)
+    logger.info(f'Загружено учетных записей: {len(accounts)}')
+    store = StateStore()
+    restore_accounts(store, accounts)
+    start_http_server()
+    poller = AsyncPoller(accounts, TELEGRAM_TOKEN, store=store)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        for signum in SHUTDOWN_SIGNALS:
+            loop.add_signal_handler(signum, poller.stop)
+        await poller.run()
+
+    asyncio.run(run())
+    store.close()
+    logger.info('Работа бота завершена')
+
+
+if __name__ == '__main__':
+    main()
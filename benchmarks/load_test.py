@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import json
+import resource
+import threading
+import time
+import tracemalloc
+
+import telegram
+
+from accounts import Account, MultiAccountPoller
+from api_client import PracticumClient, RequestBudget
+from async_poller import AsyncPoller
+from benchmarks.stubs import PracticumStub, TelegramStub
+from homework import send_chat_message
+from metrics import CYCLE_DURATION
+from outbox import TelegramOutbox
+from scheduling import AdaptiveInterval
+
+STUB_TELEGRAM_TOKEN = '123456:' + 'A' * 35
+
+
+def _round(seconds):
+    return None if seconds is None else round(seconds, 4)
+
+
+def _run_threads(pool, duration, concurrency, practicum, telegram_stub,
+                 interval):
+    """Гоняет многопоточный MultiAccountPoller, возвращает время работы."""
+    bot = telegram.Bot(
+        token=STUB_TELEGRAM_TOKEN, base_url=telegram_stub.base_url
+    )
+    outbox = TelegramOutbox(
+        bot, send_chat_message, global_rate=10 ** 6, chat_rate=10 ** 6
+    ).start()
+    client = PracticumClient(
+        practicum.endpoint, pool_size=concurrency, retries=0,
+        budget=RequestBudget(rate=0)
+    )
+    poller = MultiAccountPoller(
+        outbox, pool, concurrency, client=client,
+        spread=interval, tick=interval / 10
+    )
+    thread = threading.Thread(target=poller.run, daemon=True)
+    started = time.monotonic()
+    thread.start()
+    time.sleep(duration)
+    poller.stop()
+    thread.join()
+    elapsed = time.monotonic() - started
+    outbox.close(timeout=5)
+    client.close()
+    return elapsed
+
+
+def _run_async(pool, duration, concurrency, practicum, telegram_stub,
+               interval):
+    """Гоняет асинхронный AsyncPoller, возвращает время работы."""
+    poller = AsyncPoller(
+        pool, STUB_TELEGRAM_TOKEN, concurrency,
+        endpoint=practicum.endpoint, telegram_url=telegram_stub.base_url,
+        global_rate=10 ** 6, chat_rate=10 ** 6, spread=interval,
+        budget=RequestBudget(rate=0)
+    )
+
+    async def run():
+        asyncio.get_running_loop().call_later(duration, poller.stop)
+        await poller.run()
+
+    started = time.monotonic()
+    asyncio.run(run())
+    return time.monotonic() - started
+
+
+def run_load_test(accounts=100, duration=10.0, interval=1.0, concurrency=32,
+                  homeworks=1, api_latency=0.05, api_error_rate=0.0,
+                  telegram_latency=0.01, telegram_error_rate=0.0,
+                  trace_memory=False, use_async=False):
+    """Гоняет настоящий цикл опроса против локальных заглушек.
+
+    Возвращает словарь с пропускной способностью, задержкой опроса
+    и памятью на учетную запись.
+    """
+    practicum = PracticumStub(
+        homeworks=homeworks, latency=api_latency, error_rate=api_error_rate
+    ).start()
+    telegram_stub = TelegramStub(
+        latency=telegram_latency, error_rate=telegram_error_rate
+    ).start()
+    if trace_memory:
+        tracemalloc.start()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    pool = [
+        Account(str(index), f'token-{index}', index)
+        for index in range(accounts)
+    ]
+    for account in pool:
+        account.interval = AdaptiveInterval(
+            interval, min_interval=interval, reviewing_interval=interval,
+            max_interval=interval
+        )
+    CYCLE_DURATION.reset()
+    if use_async:
+        elapsed = _run_async(pool, duration, concurrency, practicum,
+                             telegram_stub, interval)
+    else:
+        elapsed = _run_threads(pool, duration, concurrency, practicum,
+                               telegram_stub, interval)
+    if trace_memory:
+        memory = tracemalloc.get_traced_memory()[0] - memory_before
+        tracemalloc.stop()
+    else:
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory = (rss_after - rss_before) * 1024
+    practicum.stop()
+    telegram_stub.stop()
+    return {
+        'mode': 'async' if use_async else 'threads',
+        'accounts': accounts,
+        'duration': round(elapsed, 3),
+        'api_requests': practicum.requests,
+        'requests_per_second': round(practicum.requests / elapsed, 1),
+        'telegram_requests': telegram_stub.requests,
+        'cycle_p50': _round(CYCLE_DURATION.quantile(0.5)),
+        'cycle_p99': _round(CYCLE_DURATION.quantile(0.99)),
+        'memory_per_account': round(memory / accounts),
+    }
+
+
+def main():
+    """Запускает нагрузочный тест из командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный тест цикла опроса на локальных заглушках'
+    )
+    parser.add_argument('--accounts', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--homeworks', type=int, default=1)
+    parser.add_argument('--api-latency', type=float, default=0.05)
+    parser.add_argument('--api-error-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-latency', type=float, default=0.01)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0)
+    parser.add_argument('--trace-memory', action='store_true')
+    parser.add_argument(
+        '--async', dest='use_async', action='store_true',
+        help='Использовать асинхронный цикл опроса'
+    )
+    args = parser.parse_args()
+    report = run_load_test(**vars(args))
+    print(json.dumps(report, indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Замер памяти на отслеживаемые работы: словари API и компактные записи."""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from homework import HOMEWORK_VERDICT, HomeworkRecord, intern_status
+
+STATUSES = list(HOMEWORK_VERDICT)
+
+
+def make_bodies(homeworks=100_000, accounts=1000):
+    """Тела ответов API: работы поровну распределены по учетным записям."""
+    per_account = max(homeworks // accounts, 1)
+    bodies = []
+    for account in range(accounts):
+        items = []
+        for index in range(per_account):
+            number = account * per_account + index
+            items.append({
+                'id': number,
+                'status': STATUSES[number % len(STATUSES)],
+                'homework_name': f'student{account}__hw{index:02d}.zip',
+                'reviewer_comment': 'Код аккуратный, замечаний нет.',
+                'date_updated': '2022-01-01T12:00:00Z',
+                'lesson_name': f'Спринт {index}',
+            })
+        bodies.append(json.dumps({'homeworks': items, 'current_date': 0}))
+    return bodies
+
+
+def _retained(build, bodies):
+    """Сколько байт остается занято результатом build(bodies)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(bodies)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return retained
+
+
+def keep_dicts(bodies):
+    """Хранит работы так, как их вернул JSON-декодер."""
+    return [json.loads(body)['homeworks'] for body in bodies]
+
+
+def keep_records(bodies):
+    """Хранит только компактные записи о работах."""
+    return [
+        [
+            HomeworkRecord.from_api(item)
+            for item in json.loads(body)['homeworks']
+        ]
+        for body in bodies
+    ]
+
+
+def keep_statuses(bodies, intern=True):
+    """Хранит кэш статусов учетных записей, как его держит бот."""
+    caches = []
+    for body in bodies:
+        cache = {}
+        for item in json.loads(body)['homeworks']:
+            status = item['status']
+            cache[str(item['id'])] = (
+                intern_status(status) if intern else status
+            )
+        caches.append(cache)
+    return caches
+
+
+def measure(homeworks=100_000, accounts=1000):
+    """Возвращает байты на одну работу для разных способов хранения."""
+    bodies = make_bodies(homeworks, accounts)
+    count = sum(len(json.loads(body)['homeworks']) for body in bodies)
+    report = {'homeworks': count}
+    for name, build in (
+        ('api_dicts', keep_dicts),
+        ('records', keep_records),
+        ('status_cache', keep_statuses),
+        ('status_cache_not_interned',
+         lambda bodies: keep_statuses(bodies, intern=False)),
+    ):
+        report[f'{name}_bytes'] = round(_retained(build, bodies) / count, 1)
+    return report
+
+
+def main():
+    """Печатает отчет о памяти на одну отслеживаемую работу."""
+    parser = argparse.ArgumentParser(
+        description='Память на отслеживаемые домашние работы'
+    )
+    parser.add_argument('--homeworks', type=int, default=100_000)
+    parser.add_argument('--accounts', type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(
+        measure(args.homeworks, args.accounts), indent=4, ensure_ascii=False
+    ))
+
+
+if __name__ == '__main__':
+    main()
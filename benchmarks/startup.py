@@ -0,0 +1,67 @@
+"""Замер времени импорта модулей бота по данным python -X importtime."""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+STARTUP_BUDGET = float(os.getenv('STARTUP_BUDGET', 0.15))
+HEAVY_MODULES = ('telegram', 'requests', 'urllib3', 'aiohttp', 'http.server')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def import_time(module):
+    """Время импорта module в секундах, включая зависимости."""
+    stderr = _run(f'import {module}', '-X', 'importtime').stderr
+    for line in stderr.splitlines():
+        _, cumulative_us, name = line.split('|')
+        if name == f' {module}':
+            return int(cumulative_us) / 10 ** 6
+    raise ValueError(f'Модуль {module} не найден в выводе importtime')
+
+
+def heavy_imports(module, heavy=HEAVY_MODULES):
+    """Тяжелые модули, которые загружаются вместе с module."""
+    code = f'import sys, {module}; print(" ".join(sys.modules))'
+    loaded = set(_run(code).stdout.split())
+    return [name for name in heavy if name in loaded]
+
+
+def measure(module='homework', repeat=5, budget=STARTUP_BUDGET):
+    """Возвращает отчет о запуске: лучшее время импорта из repeat замеров."""
+    seconds = min(import_time(module) for _ in range(repeat))
+    return {
+        'module': module,
+        'import_seconds': round(seconds, 4),
+        'budget_seconds': budget,
+        'within_budget': seconds <= budget,
+        'heavy_imports': heavy_imports(module),
+    }
+
+
+def main():
+    """Печатает отчет и завершается с ошибкой при превышении бюджета."""
+    parser = argparse.ArgumentParser(
+        description='Время импорта модулей бота'
+    )
+    parser.add_argument('modules', nargs='*', default=['homework'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET)
+    args = parser.parse_args()
+    reports = [
+        measure(module, args.repeat, args.budget) for module in args.modules
+    ]
+    print(json.dumps(reports, indent=4, ensure_ascii=False))
+    if not all(report['within_budget'] for report in reports):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import json
+import random
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HOMEWORK_STATUSES = ('reviewing', 'approved', 'rejected')
+
+
+class StubServer:
+    """Локальный HTTP сервер-заглушка с задержкой и долей ошибок."""
+
+    handler = None
+
+    def __init__(self, latency=0.0, error_rate=0.0, host='127.0.0.1'):
+        """Создает сервер на свободном порту, не запуская его."""
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        handler = type('Handler', (self.handler,), {'stub': self})
+        self.server = ThreadingHTTPServer((host, 0), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        """Базовый адрес сервера."""
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает сервер."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count_connection(self):
+        """Учитывает новое соединение клиента."""
+        with self._lock:
+            self.connections += 1
+
+    def count_request(self):
+        """Учитывает запрос, выдерживает задержку и решает, вернуть ли сбой."""
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return random.random() < self.error_rate
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Общая часть обработчиков заглушек."""
+
+    protocol_version = 'HTTP/1.1'
+    stub = None
+
+    def setup(self):
+        """Учитывает соединение: обработчик создается на каждое."""
+        super().setup()
+        self.stub.count_connection()
+
+    def send_json(self, status, data):
+        """Отправляет JSON ответ."""
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишет в лог каждый запрос."""
+
+
+class PracticumHandler(StubHandler):
+    """Отвечает как эндпоинт статусов домашних работ."""
+
+    def do_GET(self):
+        """Возвращает случайные статусы работ."""
+        if self.stub.count_request():
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {})
+            return
+        query = parse_qs(urlparse(self.path).query)
+        if 'from_date' not in query:
+            self.send_json(HTTPStatus.BAD_REQUEST, {})
+            return
+        homeworks = [
+            {
+                'id': index,
+                'homework_name': f'hw{index}',
+                'status': random.choice(HOMEWORK_STATUSES),
+                'reviewer_comment': '',
+                'date_updated': '2021-09-01T00:00:00Z',
+                'lesson_name': 'Нагрузочный тест',
+            }
+            for index in range(self.stub.homeworks)
+        ]
+        self.send_json(HTTPStatus.OK, {
+            'homeworks': homeworks,
+            'current_date': int(time.time()),
+        })
+
+
+class PracticumStub(StubServer):
+    """Заглушка API Практикума."""
+
+    handler = PracticumHandler
+
+    def __init__(self, homeworks=1, **kwargs):
+        """Число работ в каждом ответе задает homeworks."""
+        super().__init__(**kwargs)
+        self.homeworks = homeworks
+
+    @property
+    def endpoint(self):
+        """Адрес эндпоинта статусов."""
+        return f'{self.url}/api/user_api/homework_statuses/'
+
+
+class TelegramHandler(StubHandler):
+    """Отвечает как метод sendMessage Bot API."""
+
+    def do_POST(self):
+        """Подтверждает отправку сообщения."""
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if self.stub.count_request():
+            self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {
+                'ok': False, 'error_code': 500, 'description': 'stub'
+            })
+            return
+        self.send_json(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': self.stub.requests,
+            'date': int(time.time()),
+            'chat': {'id': 1, 'type': 'private'},
+            'text': '',
+        }})
+
+
+class TelegramStub(StubServer):
+    """Заглушка Telegram Bot API."""
+
+    handler = TelegramHandler
+
+    @property
+    def base_url(self):
+        """Адрес для параметра base_url у telegram.Bot."""
+        return f'{self.url}/bot'
@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+class SystemClock:
+    """Настоящие часы процесса."""
+
+    def time(self):
+        """Текущее время в секундах Unix."""
+        return time.time()
+
+    def monotonic(self):
+        """Монотонное время для измерения интервалов."""
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        """Приостанавливает поток на seconds секунд."""
+        time.sleep(seconds)
+
+
+class InterruptibleClock(SystemClock):
+    """Настоящие часы, сон которых прерывается вызовом interrupt()."""
+
+    def __init__(self):
+        """Создает часы, сон которых еще не прерван."""
+        self._interrupted = threading.Event()
+
+    def interrupt(self):
+        """Будит спящий поток и запрещает дальнейший сон."""
+        self._interrupted.set()
+
+    def interrupted(self):
+        """Был ли вызван interrupt()."""
+        return self._interrupted.is_set()
+
+    def sleep(self, seconds):
+        """Спит seconds секунд или до вызова interrupt()."""
+        self._interrupted.wait(seconds)
+
+
+class VirtualClock:
+    """Виртуальные часы: сон мгновенно сдвигает время вперед.
+
+    Позволяют прогнать недели работы цикла опроса за секунды.
+    """
+
+    def __init__(self, start=0.0):
+        """Начинает отсчет с момента start."""
+        self.now = float(start)
+
+    def time(self):
+        """Текущее виртуальное время в секундах Unix."""
+        return self.now
+
+    def monotonic(self):
+        """Монотонное виртуальное время."""
+        return self.now
+
+    def sleep(self, seconds):
+        """Сдвигает виртуальное время на seconds секунд."""
+        self.now += seconds
+
+
+SYSTEM_CLOCK = SystemClock()
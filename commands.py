@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from api_client import RequestBudget
+from homework import HOMEWORK_VERDICT, HomeworkRecord, check_response
+from metrics import COMMANDS
+from scheduling import POLL_MAX_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+COMMANDS_ENABLED = os.getenv('COMMANDS_ENABLED', '0') == '1'
+COMMAND_CACHE_SIZE = int(os.getenv('COMMAND_CACHE_SIZE', 10000))
+COMMAND_CACHE_TTL = float(os.getenv('COMMAND_CACHE_TTL', POLL_MAX_INTERVAL))
+COMMAND_FETCH_RATE = float(os.getenv('COMMAND_FETCH_RATE', 0.2))
+COMMAND_POLL_TIMEOUT = int(os.getenv('COMMAND_POLL_TIMEOUT', 10))
+COMMAND_RETRY_DELAY = float(os.getenv('COMMAND_RETRY_DELAY', 5))
+HISTORY_LIMIT = int(os.getenv('HISTORY_LIMIT', 10))
+
+CacheEntry = namedtuple('CacheEntry', 'records updated complete')
+
+
+class ResponseCache:
+    """LRU-кэш последних известных работ учетных записей со сроком жизни.
+
+    Цикл опроса кладет сюда каждый проверенный ответ API, поэтому пока
+    опрос идет, записи остаются свежими. Работы из новых ответов
+    дополняют уже известные: новые и изменившиеся идут первыми.
+    complete отмечает записи, в которых есть вся история работ.
+    """
+
+    def __init__(self, maxsize=COMMAND_CACHE_SIZE, ttl=COMMAND_CACHE_TTL,
+                 clock=time.monotonic):
+        """Создает пустой кэш; clock - источник монотонного времени."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Количество учетных записей в кэше."""
+        return len(self._entries)
+
+    def update(self, account, homeworks, complete=False):
+        """Запоминает работы из проверенного ответа API."""
+        merged = {}
+        for homework in homeworks:
+            if isinstance(homework, dict):
+                homework = HomeworkRecord.from_api(homework)
+            merged[homework.key] = homework
+        with self._lock:
+            entry = self._entries.pop(account, None)
+            if entry is not None:
+                for record in entry.records:
+                    merged.setdefault(record.key, record)
+                complete = complete or entry.complete
+            self._entries[account] = CacheEntry(
+                list(merged.values()), self.clock(), complete
+            )
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, account):
+        """Возвращает запись кэша или None, отмечая её как использованную."""
+        with self._lock:
+            entry = self._entries.get(account)
+            if entry is not None:
+                self._entries.move_to_end(account)
+            return entry
+
+    def is_fresh(self, entry):
+        """Не истек ли срок жизни записи."""
+        return self.clock() - entry.updated <= self.ttl
+
+
+def verdict(status):
+    """Текст вердикта по статусу работы."""
+    return HOMEWORK_VERDICT.get(status, status)
+
+
+def format_status(records):
+    """Текст ответа на /status по работам учетной записи."""
+    if records is None:
+        return 'Статус пока неизвестен, попробуйте позже.'
+    if not records:
+        return 'Работ на проверке нет.'
+    record = records[0]
+    return f'Работа "{record.name}": {verdict(record.status)}'
+
+
+def format_history(records, limit=HISTORY_LIMIT):
+    """Текст ответа на /history по работам учетной записи."""
+    if records is None:
+        return 'История пока неизвестна, попробуйте позже.'
+    if not records:
+        return 'Работ пока нет.'
+    return '\n'.join(
+        f'{record.name}: {verdict(record.status)}'
+        for record in records[:limit]
+    )
+
+
+class CommandHandler:
+    """Отвечает на команды /status и /history из кэша ответов API.
+
+    fetch(account) запрашивает у API всю историю учетной записи, а
+    accounts_for(chat_id) возвращает имена учетных записей чата. К API
+    обращаемся, только если в кэше нет свежих данных, и не чаще, чем
+    разрешает budget. Без права на запрос отвечаем устаревшими данными.
+    """
+
+    def __init__(self, cache, fetch, accounts_for, budget=None):
+        """Без budget запросы ограничиваются COMMAND_FETCH_RATE."""
+        self.cache = cache
+        self.fetch = fetch
+        self.accounts_for = accounts_for
+        self.budget = budget or RequestBudget(COMMAND_FETCH_RATE, 1)
+        self.commands = {
+            '/status': (format_status, False),
+            '/history': (format_history, True),
+        }
+
+    def handle(self, chat_id, text):
+        """Возвращает ответ на сообщение или None, если это не команда."""
+        command = text.split()[0].split('@')[0].lower() if text else ''
+        if command not in self.commands:
+            return None
+        names = self.accounts_for(chat_id)
+        if not names:
+            return 'Этот чат не подписан ни на одну учетную запись.'
+        render, need_history = self.commands[command]
+        replies = []
+        for name in names:
+            reply = render(self.records(name, need_history))
+            replies.append(f'[{name}] {reply}' if len(names) > 1 else reply)
+        return '\n\n'.join(replies)
+
+    def records(self, account, need_history=False):
+        """Работы учетной записи: из кэша или, если он устарел, из API."""
+        entry = self.cache.get(account)
+        if entry is not None and self.cache.is_fresh(entry) and (
+            entry.complete or (entry.records and not need_history)
+        ):
+            COMMANDS.inc(source='cache')
+            return entry.records
+        stale = entry.records if entry is not None else None
+        if self.budget.reserve():
+            COMMANDS.inc(source='stale')
+            return stale
+        try:
+            homeworks = check_response(self.fetch(account))
+        except Exception as error:
+            logger.error(
+                f'[{account}] Не удалось ответить на команду: {error}'
+            )
+            COMMANDS.inc(source='stale')
+            return stale
+        self.cache.update(account, homeworks, complete=True)
+        COMMANDS.inc(source='api')
+        return self.cache.get(account).records
+
+
+class CommandListener:
+    """Получает команды через long polling Telegram в фоновом потоке.
+
+    Ответы ставятся в ту же очередь отправки, что и уведомления, поэтому
+    подчиняются тем же лимитам Telegram.
+    """
+
+    def __init__(self, bot, handler, outbox, timeout=COMMAND_POLL_TIMEOUT,
+                 retry_delay=COMMAND_RETRY_DELAY):
+        """Создает слушателя; поток запускается в start()."""
+        self.bot = bot
+        self.handler = handler
+        self.outbox = outbox
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.offset = None
+        self.stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='telegram-commands', daemon=True
+        )
+
+    def start(self):
+        """Запускает фоновый поток и возвращает слушателя."""
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Останавливает поток, ожидая текущий запрос не дольше timeout."""
+        self.stopped.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def poll_once(self):
+        """Забирает новые сообщения и ставит ответы в очередь."""
+        updates = self.bot.get_updates(
+            offset=self.offset, timeout=self.timeout,
+            allowed_updates=['message']
+        )
+        for update in updates:
+            self.offset = update.update_id + 1
+            message = update.message
+            if message is None or not message.text:
+                continue
+            reply = self.handler.handle(message.chat_id, message.text)
+            if reply:
+                self.outbox.put(message.chat_id, reply)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self.poll_once()
+            except Exception as error:
+                logger.error(f'Сбой при получении команд: {error}')
+                self.stopped.wait(self.retry_delay)
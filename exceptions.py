@@ -12,3 +12,15 @@ class NegativStatusCodeError(Exception):
 
 class NotFoundDateError(NoForSendingInTelegramError):
     """Ошибка при получении даты из запроса."""
+
+
+class CircuitOpenError(NoForSendingInTelegramError):
+    """Запрос не выполнен: API временно недоступно."""
+
+
+class RateLimitedError(NoForSendingInTelegramError):
+    """API просит повторить запрос позже (ответ 429 или 503)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
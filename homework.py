@@ -1,15 +1,24 @@
+import argparse
 import logging
 import os
 import sys
+import threading
 import time
-from http import HTTPStatus
+from collections import ChainMap
 
-import requests
-import telegram
 from dotenv import load_dotenv
 
-from exceptions import (NegativeSendMessageError, NegativStatusCodeError,
-                        NoForSendingInTelegramError, NotFoundDateError)
+from alerts import ErrorThrottle
+from clock import SYSTEM_CLOCK, InterruptibleClock
+from exceptions import (NegativeSendMessageError, NoForSendingInTelegramError,
+                        NotFoundDateError)
+from logs import setup_logging
+from metrics import (CYCLE_DURATION, ERRORS, LOOP_LAG, OUTBOX_DEPTH,
+                     SEND_LATENCY, start_http_server)
+from outbox import BufferedOutbox, TelegramOutbox
+from scheduling import AdaptiveInterval, respect_retry_after
+from shutdown import handle_signals, time_left
+from state import StateStore
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -21,6 +30,10 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 RETRY_TIME = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+STATE_ACCOUNT = 'default'
+
+_api_client = None
+_api_client_lock = threading.Lock()
 
 
 HOMEWORK_VERDICT = {
@@ -28,40 +41,100 @@ HOMEWORK_VERDICT = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+STATUSES = {status: status for status in HOMEWORK_VERDICT}
+
+
+def intern_status(status):
+    """Возвращает общий объект строки статуса из HOMEWORK_VERDICT.
+
+    Тысячи закэшированных статусов ссылаются на одни и те же строки
+    вместо отдельной копии на каждую работу.
+    """
+    return STATUSES.get(status, status)
+
+
+class HomeworkRecord:
+    """Компактная запись о работе: только то, что нужно боту."""
+
+    __slots__ = ('key', 'name', 'status')
+
+    def __init__(self, key, name, status):
+        """Создает запись с общим объектом строки статуса."""
+        self.key = key
+        self.name = name
+        self.status = intern_status(status)
+
+    @classmethod
+    def from_api(cls, homework):
+        """Создает запись из проверенного элемента ответа API."""
+        name = homework.get('homework_name')
+        return cls(
+            str(homework.get('id', name)), name, homework.get('status')
+        )
+
+    def __repr__(self):
+        """Представление записи для отладки."""
+        return f'HomeworkRecord({self.key!r}, {self.name!r}, {self.status!r})'
+
+
+def make_bot(token=None):
+    """Создает бота Telegram.
+
+    Библиотека telegram тяжелая, поэтому импортируется только тогда,
+    когда бот действительно нужен.
+    """
+    import telegram
+
+    return telegram.Bot(token=token or TELEGRAM_TOKEN)
 
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
+    send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправляет сообщение в указанный Telegram чат."""
+    from telegram.error import TelegramError
+
+    started = time.monotonic()
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-    except telegram.error.TelegramError as error:
+        bot.send_message(chat_id, message)
+    except TelegramError as error:
         raise NegativeSendMessageError(
             'Произошла ошибка при отправке сообщения'
         ) from error
     else:
-        logger.info(f'Отправлено сообщение: {message}')
+        logger.info('Отправлено сообщение: %s', message)
+    finally:
+        SEND_LATENCY.observe(time.monotonic() - started)
 
 
 def get_api_answer(current_timestamp):
     """Делает запрос к эндпоинту API-сервиса."""
-    params = {'from_date': current_timestamp}
-    try:
-        homework_statuses = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params=params
-        )
-        if homework_statuses.status_code != HTTPStatus.OK:
-            raise NegativStatusCodeError(
-                'Запрос выполнен безуспешно: '
-                f'статус ответа {homework_statuses.status_code}'
-            )
-        logger.info('Запрос к эндпоинту API-сервиса прошел успешно')
-        return homework_statuses.json()
-    except requests.exceptions.RequestException as error:
-        raise ConnectionError(
-            f'Произошла ошибка при запросе к серверу: {error}'
-        )
+    return request_statuses(HEADERS, current_timestamp)
+
+
+def commit_api_answer():
+    """Отмечает последний ответ API как обработанный."""
+    get_client().commit(HEADERS)
+
+
+def request_statuses(headers, current_timestamp):
+    """Делает запрос к эндпоинту API-сервиса с заголовками учетной записи."""
+    return get_client().get_statuses(headers, current_timestamp)
+
+
+def get_client():
+    """Возвращает общий клиент API-сервиса с пулом соединений."""
+    global _api_client
+    if _api_client is None:
+        with _api_client_lock:
+            if _api_client is None:
+                from api_client import PracticumClient
+
+                _api_client = PracticumClient(ENDPOINT)
+    return _api_client
 
 
 def check_tokens():
@@ -69,80 +142,360 @@ def check_tokens():
     return all((PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID))
 
 
-def check_response(response):
-    """Проверяет ответ API на корректность."""
+def response_error(response):
+    """Возвращает ошибку в ответе API или None, ничего не выбрасывая."""
     if not isinstance(response, dict):
-        raise TypeError('Ответ не соответствует нужному формату')
+        return TypeError('Ответ не соответствует нужному формату')
     if 'homeworks' not in response:
-        raise KeyError('В ответе отсутствует ключ "homeworks"')
+        return KeyError('В ответе отсутствует ключ "homeworks"')
     if 'current_date' not in response:
-        raise NotFoundDateError('В ответе отсутствует ключ "current_date"')
+        return NotFoundDateError('В ответе отсутствует ключ "current_date"')
     if not isinstance(response.get('current_date'), int):
-        raise TypeError(
+        return TypeError(
             'Произошла ошибка в передаваемом типе ключа.'
         )
-    homeworks = response.get('homeworks')
-    if not isinstance(homeworks, list):
-        raise TypeError('Ключ "homeworks" не содержит список')
-    return homeworks
+    if not isinstance(response.get('homeworks'), list):
+        return TypeError('Ключ "homeworks" не содержит список')
+    return None
+
+
+def check_response(response):
+    """Проверяет ответ API на корректность."""
+    error = response_error(response)
+    if error is not None:
+        raise error
+    return response.get('homeworks')
+
+
+def check_responses(responses):
+    """Проверяет пачку ответов API без исключения на каждый ответ.
+
+    Возвращает два списка пар (индекс ответа, значение): списки работ
+    корректных ответов и ошибки остальных.
+    """
+    homeworks = []
+    errors = []
+    for index, response in enumerate(responses):
+        error = response_error(response)
+        if error is None:
+            homeworks.append((index, response['homeworks']))
+        else:
+            errors.append((index, error))
+    return homeworks, errors
 
 
 def parse_status(homework):
     """Проверка статуса."""
+    error = homework_error(homework)
+    if error is not None:
+        raise error
+    verdict = HOMEWORK_VERDICT[homework['status']]
+    return (
+        f'Изменился статус проверки работы "{homework["homework_name"]}". '
+        f'{verdict}'
+    )
+
+
+def homework_error(homework):
+    """Возвращает ошибку в элементе ответа API или None."""
     if not isinstance(homework, dict):
-        raise TypeError(
-            'Произошла ошибка в передаваемом типе функции.'
-        )
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    if homework_status not in HOMEWORK_VERDICT:
-        raise KeyError(
-            logger.error(f'Несуществующий статус: {homework_status}')
-        )
-    if homework_name is None:
-        raise ValueError(
-            'Ошибка в значении homework_name: ', homework_name
+        return TypeError('Произошла ошибка в передаваемом типе функции.')
+    status = homework.get('status')
+    if status not in HOMEWORK_VERDICT:
+        return KeyError(f'Несуществующий статус: {status}')
+    if homework.get('homework_name') is None:
+        return ValueError('Ошибка в значении homework_name: None')
+    return None
+
+
+def parse_statuses(homeworks):
+    """Готовит сообщения для пачки работ без исключения на каждую работу.
+
+    Корректная работа проверяется и оформляется одним поиском вердикта,
+    разбор ошибки выполняется только для некорректных. Возвращает два
+    списка пар (индекс работы, значение): сообщения и ошибки.
+    """
+    messages = []
+    errors = []
+    verdicts = HOMEWORK_VERDICT
+    for index, homework in enumerate(homeworks):
+        if isinstance(homework, dict):
+            verdict = verdicts.get(homework.get('status'))
+            name = homework.get('homework_name')
+            if verdict is not None and name is not None:
+                messages.append((
+                    index,
+                    f'Изменился статус проверки работы "{name}". {verdict}'
+                ))
+                continue
+        errors.append((index, homework_error(homework)))
+    return messages, errors
+
+
+def status_changes(homeworks, last_statuses):
+    """Возвращает изменения статусов, которых еще нет в кэше.
+
+    Каждый элемент - кортеж (ключ работы, статус, сообщение). Работы
+    обходятся от старых к новым. Кэш обновляется только после доставки
+    сообщения, см. PendingDeliveries. Если в ответе есть некорректная
+    работа, выбрасывается её ошибка.
+    """
+    changes, errors = split_changes(homeworks, last_statuses)
+    if errors:
+        raise errors[0]
+    return changes
+
+
+def split_changes(homeworks, last_statuses):
+    """Делит работы ответа на изменения статусов и ошибки.
+
+    Изменения - как у status_changes, ошибки - список исключений для
+    некорректных работ. Некорректная работа не мешает сообщить об
+    изменениях остальных.
+    """
+    homeworks = homeworks[::-1]
+    messages, errors = parse_statuses(homeworks)
+    changes = []
+    pending = {}
+    for index, message in messages:
+        homework = homeworks[index]
+        key = str(homework.get('id', homework.get('homework_name')))
+        status = intern_status(homework.get('status'))
+        if pending.get(key, last_statuses.get(key)) != status:
+            pending[key] = status
+            changes.append((key, status, message))
+    return changes, [error for _, error in errors]
+
+
+class PendingDeliveries:
+    """Изменения статусов, сообщения о которых еще не доставлены.
+
+    Статус попадает в кэш только после того, как очередь доставила
+    сообщение в первый чат - чат владельца. Остальным чатам сообщение
+    ставится в очередь только после этого, поэтому повторная отправка
+    владельцу не дублирует его подписчикам. Сообщение, которое очередь
+    так и не смогла доставить, ставится в очередь заново при следующем
+    опросе. Пока есть
+    недоставленные изменения, курсор опроса не сдвигается, поэтому после
+    перезапуска они будут найдены снова.
+    """
+
+    def __init__(self):
+        """Создает пустой учет недоставленных изменений."""
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._failed = {}
+        self._delivered = {}
+
+    def known(self, statuses):
+        """Статусы из кэша вместе с теми, что уже отправлены в очередь."""
+        with self._lock:
+            return ChainMap(
+                dict(self._in_flight), dict(self._delivered), statuses
+            )
+
+    def notify(self, outbox, chat_ids, key, status, message):
+        """Ставит сообщение об изменении статуса в очередь отправки."""
+        with self._lock:
+            self._in_flight[key] = status
+            self._failed.pop(key, None)
+        outbox.put(
+            chat_ids[0], message,
+            lambda delivered: self._done(
+                outbox, chat_ids[1:], key, status, message, delivered
+            )
         )
-    verdict = HOMEWORK_VERDICT[homework_status]
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
+    def retry(self, outbox, chat_ids):
+        """Снова ставит в очередь сообщения, которые не удалось доставить."""
+        with self._lock:
+            failed, self._failed = self._failed, {}
+        for key, (status, message) in failed.items():
+            self.notify(outbox, chat_ids, key, status, message)
 
-def main():
-    """Основная логика работы бота."""
-    logging.basicConfig(
-        level=logging.INFO,
-        handlers=[logging.StreamHandler(stream=sys.stdout)],
-        format='%(asctime)s, %(levelname)s, %(message)s, %(name)s'
+    def _done(self, outbox, subscribers, key, status, message, delivered):
+        with self._lock:
+            if self._in_flight.get(key) != status:
+                return
+            del self._in_flight[key]
+            if not delivered:
+                self._failed[key] = (status, message)
+                return
+            self._delivered[key] = status
+        if subscribers:
+            outbox.put_many(subscribers, message)
+
+    def settled(self, statuses):
+        """Переносит доставленные статусы в кэш statuses.
+
+        Возвращает True, если недоставленных изменений нет и курсор
+        можно сдвигать.
+        """
+        with self._lock:
+            statuses.update(self._delivered)
+            self._delivered.clear()
+            return not self._in_flight and not self._failed
+
+
+def notify_changes(outbox, deliveries, chat_ids, homeworks, statuses):
+    """Ставит в очередь сообщения обо всех новых изменениях статусов.
+
+    Сообщения о корректных работах ставятся в очередь, даже если в
+    ответе есть некорректные. После этого выбрасывается ошибка первой
+    некорректной работы, чтобы опрос сообщил о ней одним уведомлением.
+    """
+    changes, errors = split_changes(homeworks, deliveries.known(statuses))
+    for key, status, message in changes:
+        deliveries.notify(outbox, chat_ids, key, status, message)
+    if errors:
+        raise errors[0]
+
+
+def load_cursor(store, clock):
+    """Возвращает сохраненные курсор и статусы или начинает с текущего."""
+    current_timestamp, statuses = store.load(STATE_ACCOUNT)
+    last_statuses = {
+        key: intern_status(status) for key, status in statuses.items()
+    }
+    if current_timestamp is None:
+        return int(clock.time()), last_statuses
+    logger.info(f'Опрос продолжается с отметки {current_timestamp}')
+    return current_timestamp, last_statuses
+
+
+def report_error(errors, error):
+    """Учитывает ошибку цикла и возвращает текст уведомления или None."""
+    ERRORS.inc(exception=type(error).__name__)
+    if isinstance(error, NoForSendingInTelegramError):
+        logger.error(error)
+        return None
+    logger.error(f'Сбой в работе, требуется исправить ошибку: {error}')
+    return errors.error(error)
+
+
+def polling_loop(outbox, store, fetch=get_api_answer, clock=SYSTEM_CLOCK,
+                 should_stop=None, once=False, cache=None, commit=None):
+    """Цикл опроса API для одного пользователя.
+
+    fetch - функция запроса к API, clock - источник времени и сна,
+    should_stop - функция, по которой цикл завершается, once - выполнить
+    один опрос без ожидания следующего, cache - кэш ответов для команд,
+    commit - функция, отмечающая ответ fetch обработанным.
+    """
+    current_timestamp, last_statuses = load_cursor(store, clock)
+    next_timestamp = current_timestamp
+    deliveries = PendingDeliveries()
+    interval = AdaptiveInterval(RETRY_TIME)
+    errors = ErrorThrottle(clock=clock)
+    errors.restore(store.load_alert(STATE_ACCOUNT))
+    while should_stop is None or not should_stop():
+        homeworks = []
+        failure = None
+        cycle_started = clock.monotonic()
+        deliveries.retry(outbox, (TELEGRAM_CHAT_ID,))
+        try:
+            response = fetch(current_timestamp)
+            homeworks = check_response(response)
+            notify_changes(
+                outbox, deliveries, (TELEGRAM_CHAT_ID,), homeworks,
+                last_statuses
+            )
+            next_timestamp = response.get('current_date')
+            if commit is not None:
+                commit()
+            if cache is not None:
+                cache.update(STATE_ACCOUNT, homeworks)
+        except Exception as error:
+            failure = error
+            message = report_error(errors, error)
+        else:
+            message = errors.resolved()
+        if message:
+            outbox.put(TELEGRAM_CHAT_ID, message)
+        if deliveries.settled(last_statuses):
+            current_timestamp = next_timestamp
+        store.save(STATE_ACCOUNT, current_timestamp, last_statuses)
+        store.save_alert(STATE_ACCOUNT, errors.state())
+        store.flush(force=True)
+        CYCLE_DURATION.observe(clock.monotonic() - cycle_started)
+        if once:
+            break
+        delay = respect_retry_after(interval.update(homeworks), failure)
+        sleep_started = clock.monotonic()
+        clock.sleep(delay)
+        LOOP_LAG.observe(max(0.0, clock.monotonic() - sleep_started - delay))
+    outbox.flush(timeout=time_left())
+    if deliveries.settled(last_statuses):
+        current_timestamp = next_timestamp
+    store.save(STATE_ACCOUNT, current_timestamp, last_statuses)
+    store.flush(force=True)
+
+
+def start_commands(outbox):
+    """Запускает ответы на команды /status и /history, если они включены.
+
+    Возвращает кэш ответов API и слушателя команд или (None, None).
+    """
+    from commands import (COMMANDS_ENABLED, CommandHandler, CommandListener,
+                          ResponseCache)
+
+    if not COMMANDS_ENABLED:
+        return None, None
+    cache = ResponseCache()
+    handler = CommandHandler(
+        cache,
+        fetch=lambda account: get_client().get_statuses(
+            HEADERS, 0, conditional=False
+        ),
+        accounts_for=lambda chat_id: (
+            [STATE_ACCOUNT] if str(chat_id) == str(TELEGRAM_CHAT_ID) else []
+        ),
     )
+    listener = CommandListener(make_bot(), handler, outbox).start()
+    return cache, listener
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Бот для проверки статуса домашней работы'
+    )
+    parser.add_argument(
+        '--once', action='store_true',
+        help='Опросить API один раз, отправить сообщения и завершиться'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Основная логика работы бота."""
+    args = parse_args(argv)
+    setup_logging()
     if not check_tokens():
         logger.critical('Работа рограммы приостановленна')
         sys.exit(1)
     logger.info('Все токены доступны')
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    logger.info('Запущен телеграмм бот')
-    current_timestamp = int(time.time())
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            message = parse_status(homeworks[0])
-            send_message(bot, message)
-            current_timestamp = response.get('current_date')
-        except NoForSendingInTelegramError as error:
-            logger.error(error)
-        except Exception as error:
-            message = (
-                f'Сбой в работе, требуется исправить ошибку: {error}'
-            )
-            logger.error(message)
-            try:
-                send_message(bot, message)
-            except NegativeSendMessageError as error:
-                logger.error(
-                    f'Сбой в отправке сообщения: {error}'
-                )
-        finally:
-            time.sleep(RETRY_TIME)
+    store = StateStore()
+    if args.once:
+        outbox = BufferedOutbox(make_bot, send_chat_message)
+        polling_loop(outbox, store, once=True, commit=commit_api_answer)
+    else:
+        outbox = TelegramOutbox(make_bot(), send_chat_message).start()
+        OUTBOX_DEPTH.set_function(outbox.qsize)
+        start_http_server()
+        logger.info('Запущен телеграмм бот')
+        clock = InterruptibleClock()
+        handle_signals(clock.interrupt)
+        cache, listener = start_commands(outbox)
+        polling_loop(
+            outbox, store, clock=clock, should_stop=clock.interrupted,
+            cache=cache, commit=commit_api_answer
+        )
+        if listener is not None:
+            listener.stop(timeout=time_left())
+    outbox.close(timeout=time_left())
+    store.close()
+    logger.info('Работа бота завершена')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,73 @@
+import atexit
+import itertools
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s, %(levelname)s, %(message)s, %(name)s'
+LOG_QUEUE = os.getenv('LOG_QUEUE', '0') == '1'
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 1))
+SAMPLED_MESSAGES = frozenset([
+    'Запрос к эндпоинту API-сервиса прошел успешно',
+])
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только каждую every-ю из частых однотипных записей.
+
+    Записи с текстом из messages прореживаются, остальные проходят
+    без изменений.
+    """
+
+    def __init__(self, every=LOG_SAMPLE_EVERY, messages=SAMPLED_MESSAGES):
+        """Оставляет каждую every-ю запись с сообщением из messages."""
+        super().__init__()
+        self.every = every
+        self.messages = messages
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        """Решает, выводить ли запись."""
+        if self.every <= 1 or record.msg not in self.messages:
+            return True
+        return next(self._counter) % self.every == 0
+
+
+class LazyQueueHandler(QueueHandler):
+    """Кладет запись в очередь без форматирования.
+
+    Текст сообщения собирается из msg и args уже в фоновом потоке
+    слушателя, поэтому поток опроса не тратит время на форматирование
+    и вывод.
+    """
+
+    def prepare(self, record):
+        """Оставляет запись как есть, без форматирования."""
+        return record
+
+
+def setup_logging(level=logging.INFO, use_queue=LOG_QUEUE,
+                  sample_every=LOG_SAMPLE_EVERY, stream=None):
+    """Настраивает корневой логгер процесса.
+
+    По умолчанию записи пишутся в stdout синхронно. При use_queue
+    записи передаются через очередь фоновому слушателю, который
+    останавливается при выходе из процесса. Возвращает слушателя
+    или None.
+    """
+    handler = logging.StreamHandler(stream=stream or sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = None
+    if use_queue:
+        records = queue.SimpleQueue()
+        listener = QueueListener(records, handler)
+        listener.start()
+        atexit.register(listener.stop)
+        handler = LazyQueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_every))
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    return listener
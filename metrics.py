@@ -0,0 +1,242 @@
+import bisect
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+METRICS_PORT = os.getenv('METRICS_PORT')
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{value}"' for name, value in zip(names, values)
+    )
+    return f'{{{pairs}}}'
+
+
+class Counter:
+    """Счетчик событий с необязательными метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        """Создает счетчик с метками labelnames."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Увеличивает счетчик для набора меток."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Текущее значение счетчика для набора меток."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        """Строки значений в текстовом формате Prometheus."""
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f'{self.name}{_labels(self.labelnames, key)} {value}'
+
+
+class Gauge:
+    """Текущее значение: задается явно или вычисляется функцией."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation):
+        """Создает показатель с нулевым значением."""
+        self.name = name
+        self.documentation = documentation
+        self._value = 0
+        self._function = None
+
+    def set(self, value):
+        """Задает значение."""
+        self._value = value
+
+    def set_function(self, function):
+        """Вычисляет значение функцией в момент сбора метрик."""
+        self._function = function
+
+    def value(self):
+        """Текущее значение."""
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+    def samples(self):
+        """Строки значений в текстовом формате Prometheus."""
+        yield f'{self.name} {self.value()}'
+
+
+class Histogram:
+    """Гистограмма распределения значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        """Создает гистограмму с верхними границами buckets."""
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Добавляет наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def count(self):
+        """Количество наблюдений."""
+        return sum(self._counts)
+
+    def quantile(self, q):
+        """Оценка квантиля по корзинам, как histogram_quantile в Prometheus.
+
+        Возвращает None, если наблюдений нет.
+        """
+        with self._lock:
+            counts = list(self._counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1]
+
+    def reset(self):
+        """Обнуляет наблюдения."""
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+
+    def samples(self):
+        """Строки значений в текстовом формате Prometheus."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{bound}"}} {cumulative}'
+        yield f'{self.name}_sum {total}'
+        yield f'{self.name}_count {cumulative}'
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Создает пустой реестр."""
+        self._metrics = []
+
+    def register(self, metric):
+        """Добавляет метрику в набор."""
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+API_LATENCY = REGISTRY.register(Histogram(
+    'homework_api_request_seconds',
+    'Время запроса к API Практикума'
+))
+API_UNCHANGED = REGISTRY.register(Counter(
+    'homework_api_unchanged_total',
+    'Ответов API, которые не пришлось декодировать заново',
+    labelnames=('reason',)
+))
+SEND_LATENCY = REGISTRY.register(Histogram(
+    'homework_telegram_send_seconds',
+    'Время отправки сообщения в Telegram'
+))
+CYCLE_DURATION = REGISTRY.register(Histogram(
+    'homework_poll_cycle_seconds',
+    'Длительность опроса одной учетной записи'
+))
+LOOP_LAG = REGISTRY.register(Histogram(
+    'homework_poll_lag_seconds',
+    'Опоздание опроса относительно расписания'
+))
+ERRORS = REGISTRY.register(Counter(
+    'homework_errors_total',
+    'Количество ошибок по классу исключения',
+    labelnames=('exception',)
+))
+OUTBOX_DEPTH = REGISTRY.register(Gauge(
+    'homework_outbox_depth',
+    'Сообщений в очереди на отправку в Telegram'
+))
+POLLS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'homework_polls_in_flight',
+    'Опросов учетных записей, выполняемых прямо сейчас'
+))
+POLLS_SCHEDULED = REGISTRY.register(Gauge(
+    'homework_polls_scheduled',
+    'Учетных записей, ожидающих своего опроса'
+))
+COMMANDS = REGISTRY.register(Counter(
+    'homework_commands_total',
+    'Ответов на команды Telegram по источнику данных',
+    labelnames=('source',)
+))
+WORKERS_ALIVE = REGISTRY.register(Gauge(
+    'homework_workers_alive',
+    'Живых рабочих процессов супервизора'
+))
+WORKER_RESTARTS = REGISTRY.register(Counter(
+    'homework_worker_restarts_total',
+    'Перезапусков упавших рабочих процессов'
+))
+
+
+def start_http_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Запускает HTTP сервер метрик в фоновом потоке.
+
+    Если порт не задан, сервер не запускается и возвращается None.
+    Модули HTTP сервера импортируются только при запуске.
+    """
+    if port in (None, ''):
+        return None
+    from metrics_server import serve
+
+    server = serve(REGISTRY, host, int(port))
+    logger.info(f'Метрики доступны на http://{host}:{port}/metrics')
+    return server
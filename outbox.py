@@ -0,0 +1,267 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+TELEGRAM_SEND_ATTEMPTS = int(os.getenv('TELEGRAM_SEND_ATTEMPTS', 3))
+TELEGRAM_RETRY_BACKOFF = float(os.getenv('TELEGRAM_RETRY_BACKOFF', 2))
+MESSAGE_LIMIT = 4096
+MESSAGE_SEPARATOR = '\n\n'
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity=None):
+        """Создает полное ведро на capacity токенов."""
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self):
+        """Время до появления свободного токена."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        """Забирает один токен."""
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+
+class TelegramOutbox:
+    """Очередь исходящих сообщений с фоновой отправкой в Telegram.
+
+    Частота отправки ограничена глобально и для каждого чата отдельно.
+    Несколько ожидающих сообщений одного чата объединяются в одно, если
+    укладываются в лимит длины сообщения Telegram. Неудачная отправка
+    повторяется до max_attempts раз с экспоненциальной паузой от
+    retry_backoff секунд. Функция on_done сообщения вызывается с True
+    после доставки или с False, если все попытки исчерпаны.
+    """
+
+    def __init__(self, bot, send, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE,
+                 max_attempts=TELEGRAM_SEND_ATTEMPTS,
+                 retry_backoff=TELEGRAM_RETRY_BACKOFF):
+        """Настраивает лимиты; поток отправки запускается в start()."""
+        self.bot = bot
+        self.send = send
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._global = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        self._retry_at = {}
+        self._pending = OrderedDict()
+        self._size = 0
+        self._delivering = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name='telegram-outbox', daemon=True
+        )
+
+    def start(self):
+        """Запускает фоновую отправку."""
+        self._thread.start()
+        return self
+
+    def put(self, chat_id, text, on_done=None):
+        """Ставит сообщение в очередь на отправку."""
+        callbacks = (on_done,) if on_done else ()
+        with self._condition:
+            self._pending.setdefault(chat_id, []).append((text, 1, callbacks))
+            self._size += 1
+            self._condition.notify_all()
+
+    def put_many(self, chat_ids, text):
+        """Ставит одно сообщение в очередь сразу для нескольких чатов."""
+        with self._condition:
+            for chat_id in chat_ids:
+                self._pending.setdefault(chat_id, []).append((text, 1, ()))
+                self._size += 1
+            self._condition.notify_all()
+
+    def qsize(self):
+        """Количество сообщений, ожидающих отправки."""
+        return self._size
+
+    def flush(self, timeout=None):
+        """Ждет, пока очередь опустеет, не дольше timeout секунд."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self._size and not self._delivering, timeout
+            )
+
+    def close(self, timeout=None):
+        """Дожидается отправки очереди и останавливает фоновый поток."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._size:
+            logger.error(
+                f'Не отправлено сообщений при остановке: {self._size}'
+            )
+
+    def _bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    def _take(self):
+        """Забирает объединенное сообщение первого готового чата.
+
+        Возвращает кортеж (чат, текст, число сообщений, попытка,
+        функции on_done) либо время ожидания до готовности ближайшего чата.
+        """
+        wait = self._global.wait_time()
+        if wait:
+            return wait
+        now = time.monotonic()
+        for chat_id, items in self._pending.items():
+            bucket = self._bucket(chat_id)
+            chat_wait = max(
+                bucket.wait_time(), self._retry_at.get(chat_id, now) - now
+            )
+            if chat_wait:
+                wait = chat_wait if not wait else min(wait, chat_wait)
+                continue
+            text, attempt, callbacks = items[0]
+            texts = [text]
+            length = len(text)
+            for text, _, more in items[1:]:
+                length += len(MESSAGE_SEPARATOR) + len(text)
+                if length > MESSAGE_LIMIT:
+                    break
+                texts.append(text)
+                callbacks += more
+            del items[:len(texts)]
+            if not items:
+                del self._pending[chat_id]
+            self._retry_at.pop(chat_id, None)
+            self._size -= len(texts)
+            bucket.consume()
+            self._global.consume()
+            return (chat_id, MESSAGE_SEPARATOR.join(texts), len(texts),
+                    attempt, callbacks)
+        return wait
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batch = self._take()
+                while not isinstance(batch, tuple):
+                    if self._closed and not self._pending:
+                        return
+                    self._condition.wait(batch or None)
+                    batch = self._take()
+                self._delivering += 1
+            try:
+                self._deliver(*batch)
+            finally:
+                with self._condition:
+                    self._delivering -= 1
+                    self._condition.notify_all()
+
+    def _deliver(self, chat_id, text, count, attempt, callbacks):
+        try:
+            self.send(self.bot, chat_id, text)
+        except Exception as error:
+            logger.error(f'Сбой в отправке сообщения: {error}')
+            if attempt < self.max_attempts:
+                self._retry(chat_id, text, attempt, callbacks)
+                return
+            logger.error(
+                f'Сообщение в чат {chat_id} не доставлено '
+                f'после {attempt} попыток'
+            )
+            self._done(callbacks, False)
+        else:
+            if count > 1:
+                logger.info('Объединено сообщений в одно: %s', count)
+            self._done(callbacks, True)
+
+    def _retry(self, chat_id, text, attempt, callbacks):
+        """Возвращает сообщение в начало очереди чата с паузой."""
+        with self._condition:
+            items = self._pending.setdefault(chat_id, [])
+            items.insert(0, (text, attempt + 1, callbacks))
+            self._pending.move_to_end(chat_id, last=False)
+            self._retry_at[chat_id] = (
+                time.monotonic() + self.retry_backoff * 2 ** (attempt - 1)
+            )
+            self._size += 1
+
+    @staticmethod
+    def _done(callbacks, delivered):
+        for on_done in callbacks:
+            try:
+                on_done(delivered)
+            except Exception as error:
+                logger.error(f'Сбой в обработке доставки сообщения: {error}')
+
+
+class BufferedOutbox:
+    """Копит сообщения и отправляет их разом при закрытии.
+
+    Сообщения, добавленные функциями on_done во время отправки,
+    отправляются в том же вызове flush.
+    Бот создается фабрикой make_bot, только если есть что отправить,
+    поэтому разовый запуск без новых статусов обходится без клиента
+    Telegram. Отправка идет через TelegramOutbox с теми же лимитами.
+    """
+
+    def __init__(self, make_bot, send, **options):
+        """Параметры options передаются TelegramOutbox при отправке."""
+        self.make_bot = make_bot
+        self.send = send
+        self.options = options
+        self._messages = []
+
+    def put(self, chat_id, text, on_done=None):
+        """Запоминает сообщение для отправки при закрытии."""
+        self._messages.append((chat_id, text, on_done))
+
+    def put_many(self, chat_ids, text):
+        """Запоминает одно сообщение для нескольких чатов."""
+        self._messages.extend((chat_id, text, None) for chat_id in chat_ids)
+
+    def qsize(self):
+        """Количество сообщений, ожидающих отправки."""
+        return len(self._messages)
+
+    def flush(self, timeout=None):
+        """Отправляет накопленные сообщения, ожидая не дольше timeout."""
+        if not self._messages:
+            return
+        outbox = TelegramOutbox(
+            self.make_bot(), self.send, **self.options
+        ).start()
+        while self._messages:
+            messages, self._messages = self._messages, []
+            for chat_id, text, on_done in messages:
+                outbox.put(chat_id, text, on_done)
+            outbox.flush(timeout)
+        outbox.close(timeout)
+
+    def close(self, timeout=None):
+        """Отправляет накопленные сообщения, ожидая не дольше timeout."""
+        self.flush(timeout)
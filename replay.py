@@ -0,0 +1,154 @@
+import argparse
+import bisect
+import builtins
+import json
+import logging
+
+import exceptions
+from clock import VirtualClock
+from homework import RETRY_TIME, STATE_ACCOUNT, polling_loop
+from state import StateStore
+
+logger = logging.getLogger(__name__)
+
+
+def load_records(path):
+    """Загружает записанные ответы API из файла JSON lines.
+
+    Каждая строка - ответ get_api_answer с ключом current_date. Вместо
+    ответа строка может описывать сбой: {"current_date": ...,
+    "error": "NegativStatusCodeError", "message": "..."}.
+    """
+    records = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                records.append(json.loads(line))
+    records.sort(key=lambda record: record['current_date'])
+    return records
+
+
+def build_error(record):
+    """Восстанавливает исключение из записи о сбое."""
+    error_class = getattr(exceptions, record['error'], None)
+    if error_class is None:
+        error_class = getattr(builtins, record['error'], Exception)
+    return error_class(record.get('message', ''))
+
+
+class RecordedAPI:
+    """Отдает записанные ответы по виртуальному времени опроса.
+
+    Запрос в момент now с курсором current_timestamp получает работы из
+    всех записей с current_date после курсора и не позже now,
+    объединенные в один ответ, как это сделал бы настоящий API с
+    параметром from_date. Запись о сбое срабатывает один раз, при первом
+    запросе после её current_date; работы, не отданные из-за сбоя,
+    придут со следующим успешным ответом.
+    """
+
+    def __init__(self, records, clock):
+        """Записи records должны быть отсортированы по current_date."""
+        self.records = records
+        self.clock = clock
+        self.dates = [record['current_date'] for record in records]
+        self.position = 0
+        self.answered = None
+        self.requests = 0
+
+    @property
+    def exhausted(self):
+        """Все записи выданы успешным ответом."""
+        if not self.records:
+            return True
+        return (self.position >= len(self.records)
+                and self.answered is not None
+                and self.answered >= self.dates[-1])
+
+    def __call__(self, current_timestamp):
+        """Возвращает ответ API на момент виртуального времени."""
+        self.requests += 1
+        now = self.clock.time()
+        end = bisect.bisect_right(self.dates, now)
+        while self.position < end:
+            record = self.records[self.position]
+            self.position += 1
+            if 'error' in record:
+                raise build_error(record)
+        homeworks = []
+        start = bisect.bisect_right(self.dates, current_timestamp)
+        for record in self.records[start:end]:
+            homeworks = record.get('homeworks', []) + homeworks
+        self.answered = now
+        return {'homeworks': homeworks, 'current_date': int(now)}
+
+
+class RecordingOutbox:
+    """Запоминает сообщения вместо отправки в Telegram."""
+
+    def __init__(self, clock):
+        """Создает пустой журнал сообщений."""
+        self.clock = clock
+        self.messages = []
+
+    def put(self, chat_id, text, on_done=None):
+        """Запоминает сообщение с виртуальным временем отправки."""
+        self.messages.append((self.clock.time(), chat_id, text))
+        if on_done is not None:
+            on_done(True)
+
+    def flush(self, timeout=None):
+        """Сообщения не копятся в очереди."""
+
+    def qsize(self):
+        """Сообщения не копятся в очереди."""
+        return 0
+
+
+def replay(records, retry_time=RETRY_TIME):
+    """Прогоняет записи через настоящий цикл опроса в виртуальном времени.
+
+    Возвращает отчет с числом запросов, сообщениями и виртуальной
+    длительностью.
+    """
+    start = records[0]['current_date'] - retry_time if records else 0
+    clock = VirtualClock(start)
+    api = RecordedAPI(records, clock)
+    outbox = RecordingOutbox(clock)
+    store = StateStore(':memory:')
+    store.save(STATE_ACCOUNT, int(start), {})
+    polling_loop(
+        outbox, store, fetch=api, clock=clock,
+        should_stop=lambda: api.exhausted
+    )
+    store.close()
+    return {
+        'records': len(records),
+        'requests': api.requests,
+        'messages': len(outbox.messages),
+        'virtual_seconds': clock.time() - start,
+        'log': outbox.messages,
+    }
+
+
+def main():
+    """Прогоняет файл записанных ответов и печатает отчет."""
+    parser = argparse.ArgumentParser(
+        description='Ускоренное воспроизведение записанных ответов API'
+    )
+    parser.add_argument('path', help='Файл JSON lines с ответами API')
+    parser.add_argument(
+        '--messages', action='store_true',
+        help='Вывести отправленные сообщения'
+    )
+    args = parser.parse_args()
+    report = replay(load_records(args.path))
+    log = report.pop('log')
+    print(json.dumps(report, indent=4, ensure_ascii=False))
+    if args.messages:
+        for sent_at, _, text in log:
+            print(f'{sent_at:.0f}: {text}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+import math
+import os
+import random
+import time
+
+POLL_MIN_INTERVAL = int(os.getenv('POLL_MIN_INTERVAL', 60))
+POLL_REVIEWING_INTERVAL = int(os.getenv('POLL_REVIEWING_INTERVAL', 120))
+POLL_MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', 3600))
+POLL_BACKOFF_FACTOR = float(os.getenv('POLL_BACKOFF_FACTOR', 2))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 0.1))
+POLL_TICK = float(os.getenv('POLL_TICK', 1))
+POLL_WHEEL_SIZE = int(os.getenv('POLL_WHEEL_SIZE', 3600))
+
+REVIEWING_STATUS = 'reviewing'
+
+
+class AdaptiveInterval:
+    """Интервал опроса, зависящий от последнего статуса работы.
+
+    Пока работа на ревью, API опрашивается часто. Когда статус не меняется
+    или работ на проверке нет, интервал растет экспоненциально до
+    максимума. Новое изменение статуса возвращает базовый интервал.
+    """
+
+    def __init__(self, base, min_interval=POLL_MIN_INTERVAL,
+                 reviewing_interval=POLL_REVIEWING_INTERVAL,
+                 max_interval=POLL_MAX_INTERVAL,
+                 backoff_factor=POLL_BACKOFF_FACTOR):
+        """Начинает с базового интервала base."""
+        self.base = base
+        self.min_interval = min_interval
+        self.reviewing_interval = reviewing_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.status = None
+        self.current = self._clamp(base)
+
+    def _clamp(self, interval):
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def update(self, homeworks):
+        """Пересчитывает интервал по списку работ из ответа API.
+
+        Работы - словари из ответа или компактные записи со статусом.
+        """
+        if homeworks and isinstance(homeworks[0], dict):
+            self.status = homeworks[0].get('status')
+        elif homeworks:
+            self.status = getattr(homeworks[0], 'status', None)
+        if self.status == REVIEWING_STATUS:
+            interval = self.reviewing_interval
+        elif homeworks:
+            interval = self.base
+        else:
+            interval = self.current * self.backoff_factor
+        self.current = self._clamp(interval)
+        return self.current
+
+
+def respect_retry_after(delay, error):
+    """Откладывает опрос не меньше, чем просил API в Retry-After."""
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is None:
+        return delay
+    return max(delay, retry_after)
+
+
+def jittered(delay, jitter=POLL_JITTER):
+    """Случайно растягивает или сжимает задержку на долю jitter."""
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+def spread_offset(index, count, window):
+    """Смещение первого опроса, равномерно распределяющее count записей.
+
+    Каждая запись получает свой отрезок окна window и случайную точку
+    внутри него, чтобы опросы не совпадали после перезапуска.
+    """
+    return window * (index + random.random()) / max(count, 1)
+
+
+class TimingWheel:
+    """Хешированное колесо таймеров для планирования опросов.
+
+    Время делится на такты длиной tick, колесо из size ячеек покрывает
+    tick * size секунд, более далекие задержки учитываются числом
+    полных оборотов. Постановка, перенос и отмена выполняются за O(1),
+    а за такт просматривается только одна ячейка.
+    """
+
+    def __init__(self, tick=POLL_TICK, size=POLL_WHEEL_SIZE, start=None):
+        """Создает колесо из size ячеек по tick секунд."""
+        self.tick = tick
+        self.size = size
+        self._slots = [{} for _ in range(size)]
+        self._positions = {}
+        self._current = 0
+        self._time = time.monotonic() if start is None else start
+
+    def __len__(self):
+        """Количество запланированных элементов."""
+        return len(self._positions)
+
+    def schedule(self, item, delay):
+        """Планирует item через delay секунд, снимая прежнее расписание."""
+        self.cancel(item)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._current + ticks) % self.size
+        self._slots[slot][item] = (ticks - 1) // self.size
+        self._positions[item] = slot
+
+    def cancel(self, item):
+        """Снимает item с расписания, если он там есть."""
+        slot = self._positions.pop(item, None)
+        if slot is not None:
+            del self._slots[slot][item]
+
+    def advance(self, now):
+        """Проворачивает колесо до момента now и возвращает наступившие."""
+        due = []
+        while self._time + self.tick <= now:
+            self._time += self.tick
+            self._current = (self._current + 1) % self.size
+            slot = self._slots[self._current]
+            for item, rounds in list(slot.items()):
+                if rounds:
+                    slot[item] = rounds - 1
+                    continue
+                del slot[item]
+                del self._positions[item]
+                due.append(item)
+        return due
+
+    def time_to_next_tick(self, now):
+        """Время до следующего такта колеса."""
+        return max(0.0, self._time + self.tick - now)
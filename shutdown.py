@@ -0,0 +1,50 @@
+import logging
+import os
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+_deadline = None
+
+
+def shutdown_deadline():
+    """Момент time.monotonic(), к которому нужно завершить остановку.
+
+    Отсчитывается SHUTDOWN_TIMEOUT от сигнала остановки, а если сигнала
+    не было - от первого вызова. Все шаги остановки делят это время,
+    поэтому процесс укладывается в SHUTDOWN_TIMEOUT целиком.
+    """
+    global _deadline
+    if _deadline is None:
+        _deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+    return _deadline
+
+
+def time_left():
+    """Сколько секунд осталось до конца остановки."""
+    return max(0.0, shutdown_deadline() - time.monotonic())
+
+
+def handle_signals(callback, signals=SHUTDOWN_SIGNALS):
+    """Вызывает callback при первом сигнале остановки процесса.
+
+    Повторный сигнал обрабатывается по умолчанию и сразу завершает
+    процесс, если корректная остановка затянулась. С первого сигнала
+    отсчитывается shutdown_deadline().
+    """
+    def handler(signum, frame):
+        logger.info(
+            f'Получен сигнал {signal.Signals(signum).name}, '
+            'завершение работы'
+        )
+        shutdown_deadline()
+        for restored in signals:
+            signal.signal(restored, signal.SIG_DFL)
+        callback()
+
+    for signum in signals:
+        signal.signal(signum, handler)
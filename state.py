@@ -0,0 +1,161 @@
+import os
+import sqlite3
+import time
+
+STATE_PATH = os.getenv('STATE_PATH', 'homework_state.sqlite3')
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', 5))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cursors (
+    account TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    account TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (account, homework)
+);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    account TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'student',
+    PRIMARY KEY (account, chat_id)
+);
+CREATE INDEX IF NOT EXISTS subscriptions_by_chat
+    ON subscriptions (chat_id, account);
+CREATE TABLE IF NOT EXISTS alerts (
+    account TEXT PRIMARY KEY,
+    error TEXT NOT NULL,
+    message TEXT NOT NULL,
+    suppress_window REAL NOT NULL,
+    next_report REAL NOT NULL,
+    suppressed INTEGER NOT NULL
+);
+'''
+
+
+class StateStore:
+    """Хранит курсор current_date и последние статусы работ в SQLite.
+
+    Изменения копятся в памяти и записываются одной транзакцией не чаще
+    раза в flush_interval секунд, поэтому синхронизация с диском
+    выполняется пакетно, а не на каждый опрос.
+
+    Рядом с курсором хранится состояние подавления повторных
+    уведомлений об ошибке (см. ErrorThrottle.state()).
+
+    Таблица подписок связывает учетную запись Практикума с чатами
+    Telegram и проиндексирована в обе стороны: по учетной записи
+    (первичный ключ) и по чату.
+    """
+
+    def __init__(self, path=STATE_PATH, flush_interval=STATE_FLUSH_INTERVAL):
+        """Открывает базу в режиме WAL и создает таблицы."""
+        self.flush_interval = flush_interval
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self._pending = {}
+        self._alerts = {}
+        self._flushed_at = time.monotonic()
+
+    def load(self, account):
+        """Возвращает сохраненные курсор и статусы учетной записи."""
+        row = self.connection.execute(
+            'SELECT from_date FROM cursors WHERE account = ?', (account,)
+        ).fetchone()
+        statuses = dict(self.connection.execute(
+            'SELECT homework, status FROM statuses WHERE account = ?',
+            (account,)
+        ))
+        return (row[0] if row else None), statuses
+
+    def save(self, account, current_date, statuses):
+        """Запоминает состояние учетной записи до следующей записи на диск."""
+        self._pending[account] = (current_date, dict(statuses))
+
+    def load_alert(self, account):
+        """Возвращает сохраненное состояние уведомлений об ошибке или None."""
+        return self.connection.execute(
+            'SELECT error, message, suppress_window, next_report, suppressed '
+            'FROM alerts WHERE account = ?', (account,)
+        ).fetchone()
+
+    def save_alert(self, account, alert):
+        """Запоминает состояние уведомлений об ошибке; None - ошибки нет."""
+        self._alerts[account] = alert
+
+    def flush(self, force=False):
+        """Записывает накопленные изменения одной транзакцией."""
+        if not self._pending and not self._alerts:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        pending, self._pending = self._pending, {}
+        alerts, self._alerts = self._alerts, {}
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM alerts WHERE account = ?',
+                [(account,) for account, alert in alerts.items()
+                 if alert is None]
+            )
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?, ?, ?)',
+                [(account, *alert) for account, alert in alerts.items()
+                 if alert is not None]
+            )
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                [
+                    (account, current_date)
+                    for account, (current_date, _) in pending.items()
+                    if current_date is not None
+                ]
+            )
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)',
+                [
+                    (account, homework, status)
+                    for account, (_, statuses) in pending.items()
+                    for homework, status in statuses.items()
+                ]
+            )
+        self._flushed_at = now
+
+    def subscribe(self, account, chat_id, role='student'):
+        """Подписывает чат на изменения статусов учетной записи."""
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?)',
+                (account, str(chat_id), role)
+            )
+
+    def unsubscribe(self, account, chat_id):
+        """Отписывает чат от учетной записи."""
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM subscriptions WHERE account = ? AND chat_id = ?',
+                (account, str(chat_id))
+            )
+
+    def subscribers(self, account):
+        """Возвращает пары (чат, роль), подписанные на учетную запись."""
+        return self.connection.execute(
+            'SELECT chat_id, role FROM subscriptions WHERE account = ? '
+            'ORDER BY chat_id', (account,)
+        ).fetchall()
+
+    def subscriptions(self, chat_id):
+        """Возвращает учетные записи, на которые подписан чат."""
+        return [row[0] for row in self.connection.execute(
+            'SELECT account FROM subscriptions WHERE chat_id = ? '
+            'ORDER BY account', (str(chat_id),)
+        )]
+
+    def close(self):
+        """Записывает оставшиеся изменения и закрывает базу."""
+        self.flush(force=True)
+        self.connection.close()
@@ -0,0 +1,57 @@
+import argparse
+
+from state import StateStore
+
+ROLES = ('student', 'mentor', 'group')
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Подписка чатов Telegram на учетные записи Практикума'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='Подписать чат на учетную запись')
+    add.add_argument('account', help='Имя учетной записи из accounts.json')
+    add.add_argument('chat_id', help='Идентификатор чата Telegram')
+    add.add_argument('--role', choices=ROLES, default='student')
+    remove = commands.add_parser('remove', help='Отписать чат')
+    remove.add_argument('account')
+    remove.add_argument('chat_id')
+    show = commands.add_parser('list', help='Показать подписки')
+    target = show.add_mutually_exclusive_group(required=True)
+    target.add_argument('--account', help='Подписчики учетной записи')
+    target.add_argument('--chat', help='Учетные записи, на которые '
+                                       'подписан чат')
+    return parser.parse_args(argv)
+
+
+def run(store, args):
+    """Выполняет команду и возвращает строки для вывода."""
+    if args.command == 'add':
+        store.subscribe(args.account, args.chat_id, args.role)
+        return [f'Чат {args.chat_id} подписан на {args.account}']
+    if args.command == 'remove':
+        store.unsubscribe(args.account, args.chat_id)
+        return [f'Чат {args.chat_id} отписан от {args.account}']
+    if args.account is not None:
+        return [
+            f'{chat_id} ({role})'
+            for chat_id, role in store.subscribers(args.account)
+        ]
+    return store.subscriptions(args.chat)
+
+
+def main(argv=None):
+    """Управляет таблицей подписок в хранилище состояния."""
+    args = parse_args(argv)
+    store = StateStore()
+    try:
+        for line in run(store, args):
+            print(line)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+from accounts import (ACCOUNTS_FILE, POLL_CONCURRENCY, MultiAccountPoller,
+                      load_accounts, restore_accounts)
+from api_client import API_RATE_LIMIT, PracticumClient, RequestBudget
+from homework import ENDPOINT, TELEGRAM_TOKEN, make_bot, send_chat_message
+from logs import setup_logging
+from metrics import (OUTBOX_DEPTH, POLLS_IN_FLIGHT, POLLS_SCHEDULED,
+                     WORKER_RESTARTS, WORKERS_ALIVE, start_http_server)
+from outbox import TELEGRAM_GLOBAL_RATE, TelegramOutbox
+from shutdown import handle_signals, shutdown_deadline, time_left
+from state import StateStore
+
+logger = logging.getLogger(__name__)
+
+WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))
+RING_REPLICAS = int(os.getenv('RING_REPLICAS', 100))
+HEALTH_INTERVAL = float(os.getenv('HEALTH_INTERVAL', 10))
+WORKER_RESTART_DELAY = float(os.getenv('WORKER_RESTART_DELAY', 5))
+
+
+class HashRing:
+    """Консистентное хеширование ключей по узлам.
+
+    Каждый узел занимает replicas точек на кольце. При добавлении или
+    удалении узла переезжают только ключи, попавшие на его точки.
+    """
+
+    def __init__(self, nodes=(), replicas=RING_REPLICAS):
+        """Размещает узлы nodes на кольце."""
+        self.replicas = replicas
+        self._points = []
+        self._nodes = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        digest = hashlib.md5(str(value).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def add(self, node):
+        """Добавляет узел на кольцо."""
+        for replica in range(self.replicas):
+            point = self._hash(f'{node}:{replica}')
+            self._nodes[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node):
+        """Убирает узел с кольца."""
+        for replica in range(self.replicas):
+            point = self._hash(f'{node}:{replica}')
+            del self._nodes[point]
+            self._points.remove(point)
+
+    def node_for(self, key):
+        """Узел, отвечающий за ключ."""
+        if not self._points:
+            raise LookupError('На кольце нет ни одного узла')
+        index = bisect.bisect(self._points, self._hash(key))
+        return self._nodes[self._points[index % len(self._points)]]
+
+    def partition(self, keys):
+        """Раскладывает ключи по узлам."""
+        partition = {}
+        for key in keys:
+            partition.setdefault(self.node_for(key), []).append(key)
+        return partition
+
+
+def _report_health(worker_id, poller, outbox, health, stopped):
+    """Периодически отправляет супервизору состояние процесса."""
+    while not stopped.wait(HEALTH_INTERVAL):
+        health.put({
+            'worker': worker_id,
+            'pid': os.getpid(),
+            'accounts': len(poller.accounts),
+            'polls_in_flight': POLLS_IN_FLIGHT.value(),
+            'polls_scheduled': POLLS_SCHEDULED.value(),
+            'outbox': outbox.qsize(),
+            'time': time.time(),
+        })
+
+
+def _release_accounts(worker_id, health):
+    """Функция, подтверждающая супервизору передачу учетных записей."""
+    def release(names):
+        health.put({'worker': worker_id, 'released': list(names)})
+    return release
+
+
+def _follow_assignments(poller, control, accounts):
+    """Применяет новые наборы учетных записей от супервизора."""
+    while True:
+        names = control.get()
+        if names is None:
+            poller.stop()
+            return
+        poller.assign([accounts[name] for name in names])
+
+
+def run_worker(worker_id, names, control, health, workers=1):
+    """Рабочий процесс: опрашивает свою часть учетных записей.
+
+    Лимиты Telegram и API делятся поровну между workers процессами.
+    """
+    setup_logging()
+    accounts = {
+        account.name: account for account in load_accounts(ACCOUNTS_FILE)
+    }
+    own = [accounts[name] for name in names]
+    store = StateStore()
+    restore_accounts(store, own)
+    outbox = TelegramOutbox(
+        make_bot(), send_chat_message,
+        global_rate=TELEGRAM_GLOBAL_RATE / workers
+    ).start()
+    OUTBOX_DEPTH.set_function(outbox.qsize)
+    client = PracticumClient(
+        ENDPOINT, pool_size=POLL_CONCURRENCY,
+        budget=RequestBudget(API_RATE_LIMIT / workers)
+    )
+    poller = MultiAccountPoller(
+        outbox, own, client=client, store=store,
+        on_release=_release_accounts(worker_id, health)
+    )
+    handle_signals(poller.stop)
+    threading.Thread(
+        target=_follow_assignments, args=(poller, control, accounts),
+        daemon=True
+    ).start()
+    threading.Thread(
+        target=_report_health,
+        args=(worker_id, poller, outbox, health, poller.stopped),
+        daemon=True
+    ).start()
+    logger.info(f'[worker {worker_id}] Учетных записей: {len(own)}')
+    poller.run()
+    outbox.close(timeout=time_left())
+    store.close()
+    client.close()
+
+
+class Worker:
+    """Рабочий процесс супервизора и его текущая часть учетных записей."""
+
+    def __init__(self, worker_id, process, control, names):
+        """Запоминает процесс, его очередь команд и учетные записи."""
+        self.id = worker_id
+        self.process = process
+        self.control = control
+        self.names = names
+
+
+class Supervisor:
+    """Запускает рабочие процессы и делит между ними учетные записи.
+
+    Учетные записи распределяются консистентным хешированием имени.
+    Если процесс падает, его часть сразу раздается остальным, а сам
+    процесс перезапускается через restart_delay секунд и забирает свою
+    часть обратно. Состояние процессов собирается в health().
+
+    Передача учетной записи от живого процесса идет в два шага: старый
+    владелец снимает её с опроса, записывает состояние на диск и
+    подтверждает это через очередь состояния, и только после этого
+    учетная запись назначается новому владельцу.
+    """
+
+    def __init__(self, names, workers=WORKERS, target=run_worker,
+                 restart_delay=WORKER_RESTART_DELAY,
+                 health_interval=HEALTH_INTERVAL):
+        """Готовит кольцо из workers процессов; они запускаются в run()."""
+        self.names = list(names)
+        self.workers_count = workers
+        self.target = target
+        self.restart_delay = restart_delay
+        self.health_interval = health_interval
+        self.ring = HashRing(range(workers))
+        self.workers = {}
+        self.restarts = 0
+        self.stopped = threading.Event()
+        self._restart_at = {}
+        self._releasing = {}
+        self._health = {}
+        self._reports = multiprocessing.Queue()
+
+    def _start(self, worker_id, names):
+        control = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=self.target,
+            args=(worker_id, names, control, self._reports,
+                  self.workers_count),
+            name=f'homework-worker-{worker_id}',
+        )
+        process.start()
+        self.workers[worker_id] = Worker(worker_id, process, control, names)
+        logger.info(
+            f'Запущен процесс {worker_id} (pid {process.pid}), '
+            f'учетных записей: {len(names)}'
+        )
+
+    def _rebalance(self):
+        """Отправляет живым процессам их новые части учетных записей.
+
+        Сначала процессы снимают с опроса учетные записи, которые уходят
+        к другим. Новым владельцам они назначаются в _assign() после
+        подтверждения от старого.
+        """
+        partition = self.ring.partition(self.names)
+        for worker in self.workers.values():
+            target = set(partition.get(worker.id, []))
+            moved = [name for name in worker.names if name not in target]
+            if moved:
+                self._releasing.update((name, worker.id) for name in moved)
+                worker.names = [
+                    name for name in worker.names if name in target
+                ]
+                worker.control.put(worker.names)
+        self._assign(partition)
+        return partition
+
+    def _assign(self, partition):
+        """Назначает процессам их учетные записи, уже отпущенные другими."""
+        for worker in self.workers.values():
+            names = self._available(partition.get(worker.id, []))
+            if names != worker.names:
+                worker.names = names
+                worker.control.put(names)
+
+    def _available(self, names):
+        """Учетные записи, которые никто не удерживает."""
+        return [name for name in names if name not in self._releasing]
+
+    def _released(self, report):
+        """Учитывает подтверждение передачи учетных записей."""
+        for name in report['released']:
+            if self._releasing.get(name) == report['worker']:
+                del self._releasing[name]
+        self._assign(self.ring.partition(self.names))
+
+    def _check_workers(self):
+        """Замечает упавшие процессы и перезапускает их по расписанию."""
+        now = time.monotonic()
+        for worker in list(self.workers.values()):
+            if worker.process.is_alive():
+                continue
+            logger.error(
+                f'Процесс {worker.id} завершился с кодом '
+                f'{worker.process.exitcode}, его учетные записи '
+                'переданы другим процессам'
+            )
+            del self.workers[worker.id]
+            self._health.pop(worker.id, None)
+            self._releasing = {
+                name: owner for name, owner in self._releasing.items()
+                if owner != worker.id
+            }
+            self.ring.remove(worker.id)
+            self._restart_at[worker.id] = now + self.restart_delay
+            if self.workers:
+                self._rebalance()
+        for worker_id, restart_at in list(self._restart_at.items()):
+            if now < restart_at:
+                continue
+            del self._restart_at[worker_id]
+            self.ring.add(worker_id)
+            partition = self._rebalance()
+            self._start(
+                worker_id, self._available(partition.get(worker_id, []))
+            )
+            self.restarts += 1
+            WORKER_RESTARTS.inc()
+
+    def _collect_health(self):
+        while True:
+            try:
+                report = self._reports.get_nowait()
+            except queue.Empty:
+                return
+            if 'released' in report:
+                self._released(report)
+            elif report['worker'] in self.workers:
+                self._health[report['worker']] = report
+
+    def health(self):
+        """Сводное состояние всех рабочих процессов."""
+        self._collect_health()
+        stale_after = time.time() - 3 * self.health_interval
+        stale = sorted(
+            worker_id for worker_id, report in self._health.items()
+            if report['time'] < stale_after
+        )
+        return {
+            'workers': self.workers_count,
+            'alive': sum(
+                worker.process.is_alive()
+                for worker in self.workers.values()
+            ),
+            'restarts': self.restarts,
+            'stale': stale,
+            'accounts': sum(
+                len(worker.names) for worker in self.workers.values()
+            ),
+            'outbox': sum(
+                report['outbox'] for report in self._health.values()
+            ),
+            'polls_in_flight': sum(
+                report['polls_in_flight'] for report in self._health.values()
+            ),
+        }
+
+    def stop(self):
+        """Просит супервизор остановить процессы и завершиться."""
+        self.stopped.set()
+
+    def run(self, check_interval=1.0):
+        """Запускает процессы и следит за ними до вызова stop()."""
+        partition = self.ring.partition(self.names)
+        for worker_id in range(self.workers_count):
+            self._start(worker_id, partition.get(worker_id, []))
+        WORKERS_ALIVE.set_function(lambda: sum(
+            worker.process.is_alive()
+            for worker in list(self.workers.values())
+        ))
+        last_report = time.monotonic()
+        while not self.stopped.wait(check_interval):
+            self._collect_health()
+            self._check_workers()
+            if time.monotonic() - last_report >= self.health_interval:
+                last_report = time.monotonic()
+                logger.info(f'Состояние процессов: {self.health()}')
+        self._shutdown()
+
+    def _shutdown(self):
+        for worker in self.workers.values():
+            worker.control.put(None)
+        deadline = shutdown_deadline()
+        for worker in self.workers.values():
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.error(f'Процесс {worker.id} не завершился вовремя')
+                worker.process.terminate()
+
+
+def main():
+    """Запускает опрос учетных записей из файла в нескольких процессах."""
+    setup_logging()
+    if not TELEGRAM_TOKEN:
+        logger.critical('Работа программы приостановлена: нет TELEGRAM_TOKEN')
+        sys.exit(1)
+    accounts = load_accounts(ACCOUNTS_FILE)
+    if not accounts:
+        logger.critical('Работа программы приостановлена: нет учетных записей')
+        sys.exit(1)
+    logger.info(
+        f'Загружено учетных записей: {len(accounts)}, процессов: {WORKERS}'
+    )
+    supervisor = Supervisor(account.name for account in accounts)
+    handle_signals(supervisor.stop)
+    start_http_server()
+    supervisor.run()
+    logger.info('Работа бота завершена')
+
+
+if __name__ == '__main__':
+    main()
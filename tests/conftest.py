@@ -1,9 +1,45 @@
 import sys
 from os.path import abspath, dirname
 
+import pytest
+import requests
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 pytest_plugins = [
     'tests.fixtures.fixture_data'
 ]
+
+
+@pytest.fixture(autouse=True)
+def session_get_via_requests_get(request, monkeypatch):
+    """Направляет запросы пула соединений через подменяемый requests.get.
+
+    Нужно только тестам test_bot.py, которые подменяют requests.get.
+    Остальные тесты подменяют Session.get сами или идут через настоящую
+    сессию с пулом соединений.
+    """
+    if request.module.__name__.rpartition('.')[2] != 'test_bot':
+        return
+
+    def session_get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    monkeypatch.setattr(requests.Session, 'get', session_get)
+
+
+@pytest.fixture(autouse=True)
+def fresh_api_client(monkeypatch):
+    """Создает новый клиент API, чтобы состояние не переходило между тестами."""
+    homework = sys.modules.get('homework')
+    if homework is not None:
+        monkeypatch.setattr(homework, '_api_client', None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_shutdown_deadline(monkeypatch):
+    """Сбрасывает срок остановки, чтобы он не переходил между тестами."""
+    import shutdown
+
+    monkeypatch.setattr(shutdown, '_deadline', None)
@@ -0,0 +1,456 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+
+import requests
+
+import accounts
+import homework
+from api_client import RequestBudget, UnchangedResponse
+from state import StateStore
+from tests.utils import session_get
+
+
+class MockResponse:
+
+    def __init__(self, data, http_status=HTTPStatus.OK, headers=None):
+        self.data = data
+        self.status_code = http_status
+        self.headers = headers or {}
+
+    def json(self):
+        return self.data
+
+
+class MockOutbox:
+
+    def __init__(self):
+        self.sent = []
+
+    def put(self, chat_id, text, on_done=None):
+        self.sent.append((chat_id, text))
+        if on_done is not None:
+            on_done(True)
+
+    def put_many(self, chat_ids, text):
+        for chat_id in chat_ids:
+            self.put(chat_id, text)
+
+    def flush(self, timeout=None):
+        pass
+
+
+class FailingOutbox(MockOutbox):
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def put(self, chat_id, text, on_done=None):
+        if self.failures and on_done is not None:
+            self.failures -= 1
+            on_done(False)
+            return
+        super().put(chat_id, text, on_done)
+
+
+class TestAccounts:
+
+    def test_load_accounts(self, tmp_path):
+        path = tmp_path / 'accounts.json'
+        path.write_text(json.dumps([
+            {'name': 'ivan', 'practicum_token': 'a', 'telegram_chat_id': 1},
+            {'practicum_token': 'b', 'telegram_chat_id': 2},
+        ]))
+        loaded = accounts.load_accounts(path)
+        assert [account.name for account in loaded] == ['ivan', '1'], (
+            'Проверьте, что учетные записи загружаются из файла по порядку'
+        )
+        assert loaded[0].headers == {'Authorization': 'OAuth a'}, (
+            'Проверьте, что заголовки строятся из токена учетной записи'
+        )
+
+    def test_status_fanned_out_to_subscribers(self, monkeypatch, tmp_path):
+        calls = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            calls.append(params['from_date'])
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 200,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        store = StateStore(tmp_path / 'state.sqlite3')
+        store.subscribe('ivan', 10, 'mentor')
+        store.subscribe('ivan', '1')
+        account = accounts.Account('ivan', 'token', 1, current_timestamp=100)
+        accounts.restore_accounts(store, [account])
+        outbox = MockOutbox()
+        accounts.poll_account(homework.get_client(), outbox, account)
+        store.close()
+        assert len(calls) == 1, (
+            'Проверьте, что изменение запрашивается у API один раз'
+        )
+        assert [chat_id for chat_id, _ in outbox.sent] == [1, '10'], (
+            'Проверьте, что изменение статуса уходит владельцу и всем '
+            'подписчикам без повторов'
+        )
+
+    def test_undelivered_status_is_sent_again(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': params['from_date'] + 100,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = FailingOutbox(failures=1)
+        client = homework.get_client()
+        account = accounts.Account('ivan', 'token', 1, current_timestamp=100)
+        account.chat_ids = (1, 10)
+        accounts.poll_account(client, outbox, account)
+        assert (account.statuses, account.current_timestamp) == ({}, 100), (
+            'Проверьте, что без доставки сообщения статус не запоминается, '
+            'а курсор не сдвигается'
+        )
+        accounts.poll_account(client, outbox, account)
+        assert [chat_id for chat_id, _ in outbox.sent] == [1, 10], (
+            'Проверьте, что недоставленное изменение отправляется снова, '
+            'а подписчикам - только после доставки владельцу'
+        )
+        assert account.statuses == {'hw': 'approved'}
+        assert account.current_timestamp == 200
+
+    def test_invalid_homework_does_not_block_others(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({
+                'homeworks': [
+                    {'id': 2, 'homework_name': 'hw2', 'status': 'unknown'},
+                    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                ],
+                'current_date': 100,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        account = accounts.Account('ivan', 'token', 1, current_timestamp=0)
+        accounts.poll_account_safely(homework.get_client(), outbox, account)
+        texts = [text for _, text in outbox.sent]
+        assert len(texts) == 2 and '"hw1"' in texts[0], (
+            'Проверьте, что о корректной работе сообщается, даже если в '
+            'ответе есть некорректная, а об ошибке приходит одно '
+            'уведомление'
+        )
+        assert account.statuses == {'1': 'approved'}
+        assert account.current_timestamp == 0, (
+            'Проверьте, что при некорректной работе курсор не сдвигается'
+        )
+
+    def test_failed_response_is_processed_again(self, monkeypatch):
+        body = json.dumps({
+            'homeworks': [
+                {'id': 2, 'homework_name': 'hw2', 'status': 'unknown'},
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+            ],
+            'current_date': 100,
+        }).encode()
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            response = MockResponse(json.loads(body))
+            response.content = body
+            return response
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        client = homework.get_client()
+        account = accounts.Account('ivan', 'token', 1, current_timestamp=0)
+        accounts.poll_account_safely(client, outbox, account)
+        accounts.poll_account_safely(client, outbox, account)
+        texts = [text for _, text in outbox.sent]
+        assert not any('восстановлена' in text for text in texts), (
+            'Проверьте, что ответ с ошибкой не считается неизменившимся '
+            'при повторе'
+        )
+        assert account.current_timestamp == 0
+        assert sum('"hw1"' in text for text in texts) == 1
+
+    def test_unchanged_response_backs_off(self):
+        response = {
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 200,
+        }
+
+        class UnchangedClient:
+            def __init__(self):
+                self.responses = [response, UnchangedResponse(200)]
+
+            def get_statuses(self, headers, current_timestamp, **kwargs):
+                return self.responses.pop(0)
+
+            def commit(self, headers):
+                pass
+
+        account = accounts.Account('ivan', 'token', 1, current_timestamp=100)
+        client = UnchangedClient()
+        outbox = MockOutbox()
+        accounts.poll_account_safely(client, outbox, account)
+        base = account.interval.current
+        accounts.poll_account_safely(client, outbox, account)
+        assert account.interval.current == base * 2, (
+            'Проверьте, что неизменившийся ответ считается опросом без '
+            'изменений и интервал опроса растет'
+        )
+        assert len(outbox.sent) == 1
+
+    def test_load_accounts_missing_key(self, tmp_path):
+        path = tmp_path / 'accounts.json'
+        path.write_text(json.dumps([{'practicum_token': 'a'}]))
+        try:
+            accounts.load_accounts(path)
+        except KeyError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что при отсутствии чата выбрасывается KeyError'
+            )
+
+    def test_poll_account_uses_own_cursor(self, monkeypatch):
+        calls = []
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            calls.append((headers['Authorization'], params['from_date']))
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': params['from_date'] + 1,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        client = homework.get_client()
+        first = accounts.Account('a', 'token-a', 1, current_timestamp=100)
+        second = accounts.Account('b', 'token-b', 2, current_timestamp=200)
+        accounts.poll_account(client, outbox, first)
+        accounts.poll_account(client, outbox, second)
+        assert calls == [('OAuth token-a', 100), ('OAuth token-b', 200)], (
+            'Проверьте, что каждая учетная запись опрашивается своим '
+            'токеном и со своим курсором'
+        )
+        assert (first.current_timestamp, second.current_timestamp) == (
+            101, 201
+        )
+        assert [chat_id for chat_id, _ in outbox.sent] == [1, 2], (
+            'Проверьте, что сообщение уходит в чат своей учетной записи'
+        )
+
+    def test_poll_accounts_once_saves_cursors(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({
+                'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': params['from_date'] + 1,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        store = StateStore(':memory:')
+        pool = [
+            accounts.Account(name, 'token', index, current_timestamp=100)
+            for index, name in enumerate('ab')
+        ]
+        accounts.poll_accounts_once(
+            homework.get_client(), outbox, pool, store
+        )
+        assert store.load('a') == (101, {'hw': 'approved'}), (
+            'Проверьте, что после разового опроса курсор сохраняется'
+        )
+        assert sorted(chat_id for chat_id, _ in outbox.sent) == [0, 1]
+
+    def test_poll_account_safely_isolates_errors(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({}, HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        client = homework.get_client()
+        account = accounts.Account('a', 'token', 7, current_timestamp=100)
+        accounts.poll_account_safely(client, outbox, account)
+        assert account.current_timestamp == 100, (
+            'Проверьте, что при ошибке курсор не сдвигается'
+        )
+        assert len(outbox.sent) == 1 and outbox.sent[0][0] == 7, (
+            'Проверьте, что сообщение о сбое уходит в чат учетной записи'
+        )
+
+    def test_rate_limit_defers_next_poll(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse(
+                {}, HTTPStatus.SERVICE_UNAVAILABLE, {'Retry-After': '5000'}
+            )
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        account = accounts.Account('a', 'token', 7, current_timestamp=100)
+        delay = accounts.poll_account_safely(
+            homework.get_client(), outbox, account
+        )
+        assert delay == 5000, (
+            'Проверьте, что следующий опрос откладывается по Retry-After'
+        )
+        assert outbox.sent == [], (
+            'Убедитесь, что об ограничении частоты не сообщается в чат'
+        )
+
+    def test_poll_account_skips_repeated_status(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({
+                'homeworks': [
+                    {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+                    {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                ],
+                'current_date': 200,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        client = homework.get_client()
+        account = accounts.Account('a', 'token', 1, current_timestamp=100)
+        accounts.poll_account(client, outbox, account)
+        accounts.poll_account(client, outbox, account)
+        assert len(outbox.sent) == 2, (
+            'Проверьте, что обрабатываются все работы из ответа, '
+            'а повторный статус не отправляется'
+        )
+        assert 'hw1' in outbox.sent[0][1], (
+            'Проверьте, что сообщения отправляются от старых работ к новым'
+        )
+
+    def test_empty_response_advances_cursor_silently(self, monkeypatch):
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse({'homeworks': [], 'current_date': 200})
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        client = homework.get_client()
+        account = accounts.Account('a', 'token', 1, current_timestamp=100)
+        accounts.poll_account_safely(client, outbox, account)
+        assert account.current_timestamp == 200, (
+            'Проверьте, что пустой ответ сдвигает курсор'
+        )
+        assert outbox.sent == [], (
+            'Убедитесь, что пустой ответ не приводит к сообщению о сбое'
+        )
+
+    def test_repeated_error_notified_once(self, monkeypatch):
+        responses = [
+            MockResponse({}, HTTPStatus.INTERNAL_SERVER_ERROR),
+            MockResponse({}, HTTPStatus.INTERNAL_SERVER_ERROR),
+            MockResponse({'homeworks': [], 'current_date': 200}),
+        ]
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return responses.pop(0)
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        outbox = MockOutbox()
+        client = homework.get_client()
+        account = accounts.Account('a', 'token', 1, current_timestamp=100)
+        for _ in range(3):
+            accounts.poll_account_safely(client, outbox, account)
+        assert len(outbox.sent) == 2, (
+            'Проверьте, что о повторяющейся ошибке сообщается один раз, '
+            'а после восстановления приходит одно сообщение'
+        )
+        assert outbox.sent[1][1].startswith('Работа восстановлена')
+
+    def test_error_throttle_survives_once_runs(self, monkeypatch, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        responses = [HTTPStatus.INTERNAL_SERVER_ERROR] * 2 + [HTTPStatus.OK]
+        outbox = MockOutbox()
+
+        def mock_get(url, headers=None, params=None, **kwargs):
+            return MockResponse(
+                {'homeworks': [], 'current_date': 200}, responses.pop(0)
+            )
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        for _ in range(3):
+            store = StateStore(path)
+            account = accounts.Account('ivan', 'token', 1)
+            accounts.restore_accounts(store, [account])
+            accounts.poll_accounts_once(
+                homework.get_client(), outbox, [account], store
+            )
+            store.close()
+        texts = [text for _, text in outbox.sent]
+        assert len(texts) == 2 and texts[1].startswith(
+            'Работа восстановлена'
+        ), (
+            'Проверьте, что состояние уведомлений об ошибке сохраняется '
+            'между разовыми запусками'
+        )
+
+
+class SlowClient:
+
+    def __init__(self):
+        self.budget = RequestBudget(rate=0)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get_statuses(self, headers, current_timestamp, **kwargs):
+        self.started.set()
+        self.release.wait(5)
+        return {'homeworks': [], 'current_date': 200}
+
+    def commit(self, headers):
+        pass
+
+
+class TestMultiAccountPoller:
+
+    def test_handoff_saves_in_flight_poll_at_once(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        account = accounts.Account('ivan', 'token', 1, current_timestamp=100)
+        client = SlowClient()
+        pollers = []
+        released = []
+
+        def on_release(names):
+            reader = StateStore(path)
+            released.append((names, reader.load('ivan')[0]))
+            reader.close()
+
+        def run():
+            store = StateStore(path, flush_interval=3600)
+            pollers.append(accounts.MultiAccountPoller(
+                MockOutbox(), [account], client=client, store=store,
+                spread=0, tick=0.01, on_release=on_release
+            ))
+            pollers[0].run()
+            store.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        assert client.started.wait(5)
+        poller = pollers[0]
+        poller.assign([])
+        time.sleep(0.1)
+        client.release.set()
+        reader = StateStore(path)
+        deadline = time.monotonic() + 5
+        while (reader.load('ivan')[0] != 200
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        saved = reader.load('ivan')[0]
+        poller.stop()
+        thread.join(5)
+        reader.close()
+        assert saved == 200, (
+            'Проверьте, что результат опроса, завершившегося после '
+            'передачи учетной записи, сразу записывается на диск'
+        )
+        assert released == [(['ivan'], 200)], (
+            'Проверьте, что передача подтверждается только после записи '
+            'результата опроса на диск'
+        )
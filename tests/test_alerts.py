@@ -0,0 +1,58 @@
+from alerts import ErrorThrottle
+from exceptions import NegativStatusCodeError
+
+
+class TestErrorThrottle:
+
+    def test_repeated_error_is_suppressed(self):
+        throttle = ErrorThrottle(window=3600)
+        error = NegativStatusCodeError('статус ответа 500')
+        assert throttle.error(error), (
+            'Проверьте, что о новой ошибке сообщается сразу'
+        )
+        assert throttle.error(error) is None, (
+            'Проверьте, что повтор ошибки внутри окна подавляется'
+        )
+        assert throttle.error(ConnectionError('нет сети')), (
+            'Проверьте, что о другой ошибке сообщается сразу'
+        )
+
+    def test_repeat_after_window_is_reported_with_backoff(self):
+        throttle = ErrorThrottle(window=0, max_window=0)
+        error = NegativStatusCodeError('статус ответа 500')
+        throttle.error(error)
+        message = throttle.error(error)
+        assert message and 'повторилась' in message, (
+            'Проверьте, что после окна подавления ошибка сообщается снова'
+        )
+
+    def test_window_grows_exponentially(self):
+        throttle = ErrorThrottle(window=0.0001, max_window=10)
+        error = NegativStatusCodeError('статус ответа 500')
+        throttle.error(error)
+        throttle.next_report = 0
+        throttle.error(error)
+        assert throttle.window == 0.0002
+
+    def test_resolved_once(self):
+        throttle = ErrorThrottle()
+        assert throttle.resolved() is None, (
+            'Проверьте, что без ошибки сообщение о восстановлении не нужно'
+        )
+        throttle.error(NegativStatusCodeError('статус ответа 500'))
+        assert throttle.resolved(), (
+            'Проверьте, что после ошибки сообщается о восстановлении'
+        )
+        assert throttle.resolved() is None
+
+    def test_state_round_trip(self):
+        throttle = ErrorThrottle(window=3600)
+        error = NegativStatusCodeError('статус ответа 500')
+        throttle.error(error)
+        restored = ErrorThrottle(window=3600)
+        restored.restore(throttle.state())
+        assert restored.error(error) is None, (
+            'Проверьте, что восстановленное состояние подавляет повтор'
+        )
+        assert restored.resolved()
+        assert restored.state() is None
@@ -0,0 +1,417 @@
+import json
+import time
+from http import HTTPStatus
+
+import requests
+
+import api_client
+from benchmarks.stubs import PracticumStub
+from exceptions import (CircuitOpenError, NegativStatusCodeError,
+                        RateLimitedError)
+from tests.utils import session_get
+
+
+class MockResponse:
+
+    def __init__(self, http_status, headers=None):
+        self.status_code = http_status
+        self.headers = headers or {}
+
+    def json(self):
+        return {'homeworks': [], 'current_date': 0}
+
+
+class BodyResponse:
+
+    decoded = 0
+
+    def __init__(self, body, http_status=HTTPStatus.OK, headers=None):
+        self.status_code = http_status
+        self.content = body
+        self.headers = headers or {}
+
+    def json(self):
+        BodyResponse.decoded += 1
+        return json.loads(self.content)
+
+
+class TestPracticumClient:
+
+    def test_pool_and_retry_configured(self, api_url):
+        client = api_client.PracticumClient(
+            api_url, pool_size=17, retries=3
+        )
+        adapter = client.session.get_adapter(api_url)
+        assert adapter._pool_maxsize == 17, (
+            'Проверьте, что размер пула соединений настраивается'
+        )
+        assert client.retries == 3, (
+            'Проверьте, что число повторов настраивается'
+        )
+        assert adapter.max_retries.total == 0, (
+            'Убедитесь, что адаптер не повторяет запросы сам, в обход '
+            'бюджета времени опроса'
+        )
+        client.close()
+
+    def test_keep_alive_can_be_disabled(self, api_url):
+        client = api_client.PracticumClient(api_url, keep_alive=False)
+        assert client.session.headers['Connection'] == 'close'
+        client.close()
+
+    def test_connection_is_reused(self):
+        stub = PracticumStub(homeworks=1).start()
+        client = api_client.PracticumClient(stub.endpoint)
+        try:
+            for timestamp in range(3):
+                client.get_statuses({'Authorization': 'OAuth a'}, timestamp)
+        finally:
+            client.close()
+            stub.stop()
+        assert stub.requests == 3
+        assert stub.connections == 1, (
+            'Проверьте, что запросы к API идут через одно соединение '
+            'keep-alive из пула'
+        )
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold_and_probes_once(self, monkeypatch,
+                                                   api_url):
+        statuses = [HTTPStatus.INTERNAL_SERVER_ERROR] * 2 + [HTTPStatus.OK]
+        calls = []
+
+        def mock_get(url, **kwargs):
+            calls.append(url)
+            return MockResponse(statuses.pop(0))
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        breaker = api_client.CircuitBreaker(
+            failure_threshold=2, recovery_timeout=3600
+        )
+        client = api_client.PracticumClient(api_url, breaker=breaker)
+        for _ in range(2):
+            try:
+                client.get_statuses({}, 0)
+            except NegativStatusCodeError:
+                pass
+        assert breaker.state == breaker.OPEN, (
+            'Проверьте, что после порога сбоев предохранитель открывается'
+        )
+        try:
+            client.get_statuses({}, 0)
+        except CircuitOpenError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что при открытом предохранителе запрос '
+                'не выполняется'
+            )
+        assert len(calls) == 2
+        breaker.recovery_timeout = 0
+        client.get_statuses({}, 0)
+        assert breaker.state == breaker.CLOSED, (
+            'Проверьте, что успешный пробный запрос закрывает предохранитель'
+        )
+        client.close()
+
+    def test_half_open_allows_single_probe(self):
+        breaker = api_client.CircuitBreaker(
+            failure_threshold=1, recovery_timeout=0
+        )
+        breaker.record_failure(ConnectionError('нет сети'))
+        breaker.before_request()
+        assert breaker.state == breaker.HALF_OPEN
+        try:
+            breaker.before_request()
+        except CircuitOpenError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что в полуоткрытом состоянии выполняется '
+                'только один пробный запрос'
+            )
+        breaker.record_failure(ConnectionError('нет сети'))
+        assert breaker.state == breaker.OPEN, (
+            'Проверьте, что неудачный пробный запрос снова открывает '
+            'предохранитель'
+        )
+
+    def test_client_errors_do_not_open_circuit(self, monkeypatch, api_url):
+        monkeypatch.setattr(
+            requests.Session, 'get', session_get(
+                lambda url, **kwargs: MockResponse(HTTPStatus.UNAUTHORIZED)
+            )
+        )
+        breaker = api_client.CircuitBreaker(failure_threshold=1)
+        client = api_client.PracticumClient(api_url, breaker=breaker)
+        try:
+            client.get_statuses({}, 0)
+        except NegativStatusCodeError:
+            pass
+        assert breaker.state == breaker.CLOSED, (
+            'Убедитесь, что ошибка токена одной учетной записи '
+            'не открывает предохранитель для всех'
+        )
+        client.close()
+
+
+class TestTimeouts:
+
+    def test_timeouts_are_passed(self, monkeypatch, api_url):
+        seen = {}
+
+        def mock_get(url, **kwargs):
+            seen.update(kwargs)
+            return MockResponse(HTTPStatus.OK)
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        client = api_client.PracticumClient(
+            api_url, connect_timeout=2, read_timeout=7, cycle_budget=60
+        )
+        client.get_statuses({}, 0)
+        assert seen['timeout'] == (2, 7), (
+            'Проверьте, что в запрос передаются таймауты соединения и чтения'
+        )
+        client.close()
+
+    def test_exhausted_budget_fails_fast(self, monkeypatch, api_url):
+        calls = []
+        monkeypatch.setattr(
+            requests.Session, 'get',
+            session_get(lambda url, **kwargs: calls.append(url))
+        )
+        client = api_client.PracticumClient(api_url)
+        try:
+            client.get_statuses({}, 0, deadline=0)
+        except ConnectionError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что при исчерпанном бюджете времени '
+                'выбрасывается ConnectionError'
+            )
+        assert calls == [], (
+            'Убедитесь, что при исчерпанном бюджете запрос не отправляется'
+        )
+        client.close()
+
+    def test_retries_stop_at_deadline(self, monkeypatch, api_url):
+        timeouts = []
+
+        def hanging_get(url, timeout=None, **kwargs):
+            timeouts.append(timeout)
+            time.sleep(timeout[1])
+            raise requests.exceptions.ReadTimeout('сервер не отвечает')
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(hanging_get))
+        client = api_client.PracticumClient(
+            api_url, read_timeout=1, cycle_budget=1.5, retries=2,
+            backoff_factor=0
+        )
+        started = time.monotonic()
+        try:
+            client.get_statuses({}, 0)
+        except ConnectionError:
+            pass
+        elapsed = time.monotonic() - started
+        assert elapsed < 1.8, (
+            'Проверьте, что повторы укладываются в бюджет времени опроса'
+        )
+        assert len(timeouts) == 2 and timeouts[1][1] < 1, (
+            'Проверьте, что повтор получает только остаток бюджета'
+        )
+        client.close()
+
+    def test_hedged_request_returns_fastest(self, monkeypatch, api_url):
+        calls = []
+
+        def mock_get(url, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                time.sleep(1)
+            return MockResponse(HTTPStatus.OK)
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        client = api_client.PracticumClient(api_url, hedge=True)
+        for _ in range(api_client.API_HEDGE_MIN_SAMPLES):
+            client.latency.add(0.01)
+        started = time.monotonic()
+        client.get_statuses({}, 0)
+        assert time.monotonic() - started < 0.5, (
+            'Проверьте, что при медленном ответе отправляется повторный '
+            'запрос и берется первый ответ'
+        )
+        assert len(calls) == 2
+        client.close()
+
+
+class TestRateLimit:
+
+    def test_retry_after_is_respected(self, monkeypatch, api_url):
+        monkeypatch.setattr(
+            requests.Session, 'get', session_get(
+                lambda url, **kwargs: MockResponse(
+                    HTTPStatus.TOO_MANY_REQUESTS, {'Retry-After': '120'}
+                )
+            )
+        )
+        client = api_client.PracticumClient(api_url)
+        try:
+            client.get_statuses({}, 0)
+        except RateLimitedError as error:
+            assert error.retry_after == 120, (
+                'Проверьте, что учитывается заголовок Retry-After'
+            )
+        else:
+            assert False, (
+                'Убедитесь, что при ответе 429 выбрасывается RateLimitedError'
+            )
+        assert client.breaker.state == client.breaker.CLOSED
+        assert client.budget.reserve() > 110, (
+            'Проверьте, что Retry-After приостанавливает общий бюджет '
+            'запросов для всех учетных записей'
+        )
+        client.close()
+
+    def test_retries_are_charged_to_budget(self, monkeypatch, api_url):
+        calls = []
+
+        def failing_get(url, **kwargs):
+            calls.append(url)
+            raise requests.exceptions.ConnectionError('нет сети')
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(failing_get))
+        budget = api_client.RequestBudget(rate=0.001, capacity=2)
+        client = api_client.PracticumClient(
+            api_url, retries=5, backoff_factor=0, budget=budget
+        )
+        try:
+            client.get_statuses({}, 0)
+        except ConnectionError:
+            pass
+        assert len(calls) == 2, (
+            'Проверьте, что повторы запроса расходуют общий бюджет'
+        )
+        client.close()
+
+    def test_parse_retry_after_date(self):
+        retry_after = api_client.parse_retry_after(
+            'Wed, 21 Oct 2015 07:28:00 GMT'
+        )
+        assert retry_after == 0, (
+            'Проверьте, что прошедшая дата в Retry-After дает нулевую паузу'
+        )
+        assert api_client.parse_retry_after('soon') is None
+
+    def test_budget_defers_requests(self):
+        budget = api_client.RequestBudget(rate=1, capacity=2)
+        assert budget.reserve() == 0
+        assert budget.reserve() == 0
+        assert budget.reserve() > 0, (
+            'Проверьте, что сверх бюджета запрос откладывается'
+        )
+        assert api_client.RequestBudget(rate=0).reserve() == 0
+
+
+class TestConditionalFetch:
+
+    def test_same_body_is_not_decoded_again(self, monkeypatch, api_url):
+        body = json.dumps({
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved',
+                           'reviewer_comment': 'Отлично'}],
+            'current_date': 1,
+        }).encode()
+        monkeypatch.setattr(
+            requests.Session, 'get',
+            session_get(lambda url, **kwargs: BodyResponse(body))
+        )
+        BodyResponse.decoded = 0
+        client = api_client.PracticumClient(api_url)
+        first = client.get_statuses({'Authorization': 'OAuth a'}, 0)
+        client.commit({'Authorization': 'OAuth a'})
+        second = client.get_statuses({'Authorization': 'OAuth a'}, 1)
+        assert len(first['homeworks']) == 1
+        assert second == {'homeworks': [], 'current_date': 1}, (
+            'Проверьте, что тело с прежним отпечатком возвращается как '
+            'ответ без изменений'
+        )
+        assert BodyResponse.decoded == 1, (
+            'Проверьте, что тело с прежним отпечатком не декодируется заново'
+        )
+        assert 'reviewer_comment' not in repr(client._responses), (
+            'Убедитесь, что клиент не хранит декодированный ответ'
+        )
+        client.close()
+
+    def test_not_modified_returns_cached(self, monkeypatch, api_url):
+        seen = []
+        responses = [
+            BodyResponse(b'{"homeworks": []}', headers={'ETag': '"v1"'}),
+            BodyResponse(b'', HTTPStatus.NOT_MODIFIED),
+        ]
+
+        def mock_get(url, headers=None, **kwargs):
+            seen.append(headers)
+            return responses.pop(0)
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        client = api_client.PracticumClient(api_url)
+        client.get_statuses({'Authorization': 'OAuth a'}, 0)
+        client.commit({'Authorization': 'OAuth a'})
+        second = client.get_statuses({'Authorization': 'OAuth a'}, 0)
+        assert seen[1].get('If-None-Match') == '"v1"', (
+            'Проверьте, что при том же курсоре отправляется If-None-Match'
+        )
+        assert isinstance(second, api_client.UnchangedResponse), (
+            'Проверьте, что ответ 304 возвращается как ответ без изменений'
+        )
+        client.close()
+
+    def test_unconditional_fetch_keeps_poll_state(self, monkeypatch,
+                                                  api_url):
+        seen = []
+        body = b'{"homeworks": [], "current_date": 1}'
+
+        def mock_get(url, headers=None, **kwargs):
+            seen.append(headers)
+            return BodyResponse(body, headers={'ETag': f'"v{len(seen)}"'})
+
+        monkeypatch.setattr(requests.Session, 'get', session_get(mock_get))
+        client = api_client.PracticumClient(api_url)
+        headers = {'Authorization': 'OAuth a'}
+        client.get_statuses(headers, 100)
+        client.commit(headers)
+        history = client.get_statuses(headers, 0, conditional=False)
+        client.get_statuses(headers, 100)
+        assert 'If-None-Match' not in seen[1], (
+            'Проверьте, что запрос без условий не шлет условные заголовки'
+        )
+        assert not isinstance(history, api_client.UnchangedResponse)
+        assert seen[2].get('If-None-Match') == '"v1"', (
+            'Проверьте, что запрос без условий не сбивает состояние '
+            'условных запросов цикла опроса'
+        )
+        client.close()
+
+    def test_unprocessed_response_is_decoded_again(self, monkeypatch,
+                                                   api_url):
+        body = b'{"homeworks": [{"status": "approved"}], "current_date": 1}'
+        monkeypatch.setattr(
+            requests.Session, 'get',
+            session_get(lambda url, **kwargs: BodyResponse(body))
+        )
+        client = api_client.PracticumClient(api_url)
+        headers = {'Authorization': 'OAuth a'}
+        client.get_statuses(headers, 0)
+        again = client.get_statuses(headers, 0)
+        assert again['homeworks'], (
+            'Проверьте, что ответ, обработка которого не завершилась, '
+            'при повторе разбирается заново'
+        )
+        client.commit(headers)
+        assert isinstance(
+            client.get_statuses(headers, 0), api_client.UnchangedResponse
+        )
+        client.close()
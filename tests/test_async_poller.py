@@ -0,0 +1,106 @@
+import asyncio
+
+import aiohttp
+
+import async_poller
+from accounts import Account
+from benchmarks.stubs import PracticumStub, TelegramStub
+from exceptions import NegativeSendMessageError, NegativStatusCodeError
+
+
+class TestAsyncPoller:
+
+    def test_get_api_answer_async(self):
+        stub = PracticumStub(homeworks=2).start()
+
+        async def request():
+            async with aiohttp.ClientSession() as session:
+                return await async_poller.get_api_answer_async(
+                    session, {'Authorization': 'OAuth token'}, 0,
+                    endpoint=stub.endpoint
+                )
+
+        try:
+            response = asyncio.run(request())
+        finally:
+            stub.stop()
+        assert len(response['homeworks']) == 2, (
+            'Проверьте, что асинхронный запрос возвращает ответ API'
+        )
+
+    def test_get_api_answer_async_error_status(self):
+        stub = PracticumStub(error_rate=1).start()
+
+        async def request():
+            async with aiohttp.ClientSession() as session:
+                await async_poller.get_api_answer_async(
+                    session, {}, 0, endpoint=stub.endpoint
+                )
+
+        try:
+            asyncio.run(request())
+        except NegativStatusCodeError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что при ответе, отличном от 200, '
+                'выбрасывается NegativStatusCodeError'
+            )
+        finally:
+            stub.stop()
+
+    def test_poller_delivers_messages(self):
+        practicum = PracticumStub(homeworks=1).start()
+        telegram = TelegramStub().start()
+        accounts = [
+            Account(str(index), 'token', index, current_timestamp=0)
+            for index in range(3)
+        ]
+        poller = async_poller.AsyncPoller(
+            accounts, 'token', concurrency=2, endpoint=practicum.endpoint,
+            telegram_url=telegram.base_url, spread=0.1
+        )
+
+        async def run():
+            asyncio.get_running_loop().call_later(0.5, poller.stop)
+            await poller.run()
+
+        try:
+            asyncio.run(run())
+        finally:
+            practicum.stop()
+            telegram.stop()
+        assert practicum.requests >= 3, (
+            'Проверьте, что опрашиваются все учетные записи'
+        )
+        assert telegram.requests >= 3, (
+            'Проверьте, что о новом статусе сообщается в каждый чат'
+        )
+        assert all(account.statuses for account in accounts)
+
+    def test_owner_failure_stops_fan_out(self):
+        account = Account('ivan', 'token', 1)
+        account.chat_ids = (1, 10, 11)
+        poller = async_poller.AsyncPoller([account], 'token')
+        sent = []
+
+        async def send(session, chat_id, message):
+            if chat_id == 1 and not sent:
+                sent.append(None)
+                raise NegativeSendMessageError('Сбой отправки')
+            sent.append(chat_id)
+
+        poller.send = send
+        try:
+            asyncio.run(poller.fan_out(None, account, 'Статус'))
+        except NegativeSendMessageError:
+            pass
+        else:
+            assert False, (
+                'Убедитесь, что сбой отправки владельцу пробрасывается'
+            )
+        asyncio.run(poller.fan_out(None, account, 'Статус'))
+        assert sent == [None, 1, 10, 11], (
+            'Проверьте, что при сбое у владельца подписчикам ничего не '
+            'отправляется и повторная отправка их не дублирует'
+        )
@@ -640,3 +640,96 @@ class TestHomework:
                 f'Убедитесь, что в функции `{func_name}` обрабатываете ситуацию, '
                 'когда API возвращает код, отличный от 200'
             )
+
+    def test_status_changes(self):
+        import homework
+
+        func_name = 'status_changes'
+        utils.check_function(homework, func_name, 2)
+
+        homeworks = [
+            {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+        ]
+        last_statuses = {'1': 'approved'}
+        changes = homework.status_changes(homeworks, last_statuses)
+        assert [key for key, _, _ in changes] == ['2'], (
+            f'Проверьте, что функция `{func_name}` пропускает работы, '
+            'статус которых не изменился'
+        )
+        assert changes[0][2] == homework.parse_status(homeworks[0]), (
+            f'Проверьте, что функция `{func_name}` возвращает сообщение '
+            'о смене статуса'
+        )
+        assert last_statuses == {'1': 'approved'}, (
+            f'Убедитесь, что функция `{func_name}` не меняет кэш статусов'
+        )
+
+    def test_parse_statuses(self):
+        import homework
+
+        func_name = 'parse_statuses'
+        utils.check_function(homework, func_name, 1)
+
+        homeworks = [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'unknown'},
+            'not a dict',
+            {'status': 'rejected'},
+        ]
+        messages, errors = homework.parse_statuses(homeworks)
+        assert messages == [(0, homework.parse_status(homeworks[0]))], (
+            f'Проверьте, что функция `{func_name}` возвращает сообщения '
+            'для корректных работ'
+        )
+        assert [(index, type(error)) for index, error in errors] == [
+            (1, KeyError), (2, TypeError), (3, ValueError)
+        ], (
+            f'Проверьте, что функция `{func_name}` возвращает ошибки '
+            'некорректных работ отдельным списком'
+        )
+
+    def test_check_responses(self):
+        import homework
+
+        func_name = 'check_responses'
+        utils.check_function(homework, func_name, 1)
+
+        responses = [
+            {'homeworks': [], 'current_date': 1},
+            {'current_date': 1},
+            [],
+        ]
+        homeworks, errors = homework.check_responses(responses)
+        assert homeworks == [(0, [])], (
+            f'Проверьте, что функция `{func_name}` возвращает работы '
+            'корректных ответов'
+        )
+        assert [(index, type(error)) for index, error in errors] == [
+            (1, KeyError), (2, TypeError)
+        ], (
+            f'Проверьте, что функция `{func_name}` не выбрасывает '
+            'исключение на каждый ответ'
+        )
+
+    def test_get_client_is_shared_between_threads(self):
+        import threading
+
+        import homework
+
+        barrier = threading.Barrier(8)
+        clients = []
+
+        def get():
+            barrier.wait()
+            clients.append(homework.get_client())
+
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(client) for client in clients}) == 1, (
+            'Проверьте, что клиент API создается один раз при запросе '
+            'из нескольких потоков'
+        )
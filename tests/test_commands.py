@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+from api_client import RequestBudget
+from commands import CommandHandler, CommandListener, ResponseCache
+
+HISTORY = {
+    'homeworks': [
+        {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+        {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+    ],
+    'current_date': 100,
+}
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingFetch:
+
+    def __init__(self, response=HISTORY):
+        self.calls = []
+        self.response = response
+
+    def __call__(self, account):
+        self.calls.append(account)
+        return self.response
+
+
+def make_handler(cache, fetch, rate=0):
+    return CommandHandler(
+        cache, fetch, accounts_for=lambda chat_id: ['ivan'],
+        budget=RequestBudget(rate, 1)
+    )
+
+
+class TestResponseCache:
+
+    def test_lru_eviction_and_ttl(self):
+        clock = FakeClock()
+        cache = ResponseCache(maxsize=2, ttl=10, clock=clock)
+        cache.update('a', [])
+        cache.update('b', [])
+        cache.get('a')
+        cache.update('c', [])
+        assert cache.get('b') is None, (
+            'Проверьте, что вытесняется давно не использованная запись'
+        )
+        assert cache.get('a') is not None
+        clock.now = 11
+        assert not cache.is_fresh(cache.get('a')), (
+            'Проверьте, что запись устаревает по истечении ttl'
+        )
+
+    def test_new_homeworks_go_first(self):
+        cache = ResponseCache()
+        cache.update('ivan', HISTORY['homeworks'], complete=True)
+        cache.update('ivan', [
+            {'id': 1, 'homework_name': 'hw1', 'status': 'rejected'}
+        ])
+        entry = cache.get('ivan')
+        assert [(r.name, r.status) for r in entry.records] == [
+            ('hw1', 'rejected'), ('hw2', 'reviewing')
+        ], 'Проверьте, что обновленные работы дополняют историю в начале'
+        assert entry.complete
+
+
+class TestCommandHandler:
+
+    def test_fresh_cache_needs_no_request(self):
+        cache = ResponseCache()
+        cache.update('ivan', HISTORY['homeworks'], complete=True)
+        fetch = RecordingFetch()
+        handler = make_handler(cache, fetch)
+        assert handler.handle(1, '/status') == (
+            'Работа "hw2": Работа взята на проверку ревьюером.'
+        )
+        assert handler.handle(1, '/history@homework_bot').count('\n') == 1
+        assert fetch.calls == [], (
+            'Проверьте, что при свежем кэше API не запрашивается'
+        )
+        assert handler.handle(1, 'привет') is None
+
+    def test_stale_cache_fetches_within_budget(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttl=10, clock=clock)
+        cache.update('ivan', HISTORY['homeworks'][1:])
+        fetch = RecordingFetch()
+        handler = make_handler(cache, fetch, rate=0.001)
+        handler.handle(1, '/history')
+        handler.handle(1, '/history')
+        assert fetch.calls == ['ivan'], (
+            'Проверьте, что за полной историей API запрашивается один раз'
+        )
+        clock.now = 11
+        assert handler.handle(1, '/status').startswith('Работа "hw2"'), (
+            'Проверьте, что без права на запрос отвечаем устаревшими данными'
+        )
+        assert fetch.calls == ['ivan']
+
+
+class TestCommandListener:
+
+    def test_replies_go_to_outbox(self):
+        message = SimpleNamespace(chat_id=1, text='/status')
+        updates = [
+            SimpleNamespace(update_id=7, message=message),
+            SimpleNamespace(update_id=8, message=None),
+        ]
+        offsets = []
+
+        def get_updates(offset=None, timeout=None, allowed_updates=None):
+            offsets.append(offset)
+            return updates
+
+        sent = []
+        outbox = SimpleNamespace(put=lambda chat_id, text: sent.append(
+            (chat_id, text)
+        ))
+        cache = ResponseCache()
+        cache.update('ivan', HISTORY['homeworks'], complete=True)
+        listener = CommandListener(
+            SimpleNamespace(get_updates=get_updates),
+            make_handler(cache, RecordingFetch()), outbox
+        )
+        listener.poll_once()
+        updates = []
+        listener.poll_once()
+        assert offsets == [None, 9], (
+            'Проверьте, что полученные сообщения подтверждаются смещением'
+        )
+        assert [chat_id for chat_id, _ in sent] == [1], (
+            'Проверьте, что ответ на команду ставится в очередь отправки'
+        )
@@ -0,0 +1,21 @@
+from benchmarks.load_test import run_load_test
+
+
+class TestLoadTest:
+
+    def test_load_test_report(self):
+        report = run_load_test(
+            accounts=5, duration=0.5, interval=0.1, concurrency=4,
+            homeworks=2, api_latency=0, telegram_latency=0
+        )
+        assert report['api_requests'] >= 5, (
+            'Проверьте, что нагрузочный тест опрашивает все учетные записи'
+        )
+        assert report['telegram_requests'] > 0, (
+            'Проверьте, что сообщения доходят до заглушки Telegram'
+        )
+        for key in ('requests_per_second', 'cycle_p50', 'cycle_p99',
+                    'memory_per_account'):
+            assert report[key] is not None, (
+                f'Проверьте, что отчет содержит `{key}`'
+            )
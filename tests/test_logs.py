@@ -0,0 +1,38 @@
+import atexit
+import io
+import logging
+
+import logs
+
+
+class TestLogs:
+
+    def test_sampling_filter(self):
+        sampler = logs.SamplingFilter(every=10)
+        hot = logging.makeLogRecord({
+            'msg': 'Запрос к эндпоинту API-сервиса прошел успешно'
+        })
+        passed = sum(sampler.filter(hot) for _ in range(100))
+        assert passed == 10, (
+            'Проверьте, что частые записи об успехе прореживаются'
+        )
+        other = logging.makeLogRecord({'msg': 'Отправлено сообщение: %s'})
+        assert all(sampler.filter(other) for _ in range(10)), (
+            'Убедитесь, что остальные записи не прореживаются'
+        )
+
+    def test_queue_logging_formats_in_listener(self):
+        root = logging.getLogger()
+        handlers, level = root.handlers, root.level
+        stream = io.StringIO()
+        try:
+            listener = logs.setup_logging(use_queue=True, stream=stream)
+            logging.getLogger('test').info('Отправлено сообщение: %s', 'hi')
+            atexit.unregister(listener.stop)
+            listener.stop()
+        finally:
+            root.handlers = handlers
+            root.setLevel(level)
+        assert 'Отправлено сообщение: hi' in stream.getvalue(), (
+            'Проверьте, что записи из очереди выводит фоновый слушатель'
+        )
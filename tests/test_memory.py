@@ -0,0 +1,42 @@
+import json
+
+from benchmarks import memory
+from homework import STATUSES, HomeworkRecord, status_changes
+
+
+class TestCompactRecords:
+
+    def test_record_keeps_only_needed_fields(self):
+        homework = json.loads(
+            '{"id": 7, "homework_name": "hw", "status": "approved", '
+            '"reviewer_comment": "ok"}'
+        )
+        record = HomeworkRecord.from_api(homework)
+        assert (record.key, record.name, record.status) == (
+            '7', 'hw', 'approved'
+        )
+        assert not hasattr(record, '__dict__'), (
+            'Проверьте, что запись о работе объявлена через __slots__'
+        )
+        assert record.status is STATUSES['approved'], (
+            'Проверьте, что статус берется из общих строк HOMEWORK_VERDICT'
+        )
+
+    def test_cached_statuses_are_interned(self):
+        homeworks = json.loads(
+            '[{"homework_name": "a", "status": "rejected"},'
+            ' {"homework_name": "b", "status": "rejected"}]'
+        )
+        changes = status_changes(homeworks, {})
+        assert changes[0][1] is changes[1][1], (
+            'Проверьте, что одинаковые статусы в кэше - один объект'
+        )
+
+    def test_memory_report(self):
+        report = memory.measure(homeworks=2000, accounts=20)
+        assert report['homeworks'] == 2000
+        assert report['records_bytes'] < report['api_dicts_bytes'] / 2, (
+            'Проверьте, что компактные записи занимают меньше словарей API'
+        )
+        assert (report['status_cache_bytes']
+                < report['status_cache_not_interned_bytes'])
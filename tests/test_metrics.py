@@ -0,0 +1,53 @@
+import urllib.request
+
+import metrics
+
+
+class TestMetrics:
+
+    def test_histogram_render(self):
+        histogram = metrics.Histogram('test_seconds', 'Тест', buckets=(1, 5))
+        histogram.observe(0.5)
+        histogram.observe(1)
+        histogram.observe(10)
+        lines = list(histogram.samples())
+        assert lines == [
+            'test_seconds_bucket{le="1"} 2',
+            'test_seconds_bucket{le="5"} 2',
+            'test_seconds_bucket{le="+Inf"} 3',
+            'test_seconds_sum 11.5',
+            'test_seconds_count 3',
+        ], (
+            'Проверьте, что гистограмма выводится в формате Prometheus'
+        )
+
+    def test_counter_labels(self):
+        counter = metrics.Counter(
+            'test_errors_total', 'Тест', labelnames=('exception',)
+        )
+        counter.inc(exception='KeyError')
+        counter.inc(exception='KeyError')
+        counter.inc(exception='TypeError')
+        assert counter.value(exception='KeyError') == 2
+        assert list(counter.samples()) == [
+            'test_errors_total{exception="KeyError"} 2',
+            'test_errors_total{exception="TypeError"} 1',
+        ]
+
+    def test_http_endpoint(self):
+        server = metrics.start_http_server(port=0)
+        host, port = server.server_address
+        try:
+            with urllib.request.urlopen(
+                f'http://{host}:{port}/metrics', timeout=5
+            ) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert '# TYPE homework_api_request_seconds histogram' in body, (
+            'Проверьте, что метрики доступны по адресу /metrics'
+        )
+
+    def test_http_server_disabled_without_port(self):
+        assert metrics.start_http_server(port=None) is None
@@ -0,0 +1,114 @@
+import threading
+
+from exceptions import NegativeSendMessageError
+from outbox import (MESSAGE_LIMIT, BufferedOutbox, TelegramOutbox,
+                    TokenBucket)
+
+
+class RecordingSender:
+
+    def __init__(self, failures=0):
+        self.sent = []
+        self.failures = failures
+        self.event = threading.Event()
+
+    def __call__(self, bot, chat_id, text):
+        if self.failures:
+            self.failures -= 1
+            raise NegativeSendMessageError('Ошибка отправки')
+        self.sent.append((chat_id, text))
+        self.event.set()
+
+
+class TestTokenBucket:
+
+    def test_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=1)
+        assert bucket.wait_time() == 0
+        bucket.consume()
+        assert 0 < bucket.wait_time() <= 1, (
+            'Проверьте, что после расхода токена нужно подождать'
+        )
+
+
+class TestTelegramOutbox:
+
+    def test_pending_messages_are_coalesced(self):
+        sender = RecordingSender()
+        outbox = TelegramOutbox(None, sender)
+        outbox.put(1, 'первое')
+        outbox.put(1, 'второе')
+        outbox.put(2, 'третье')
+        assert outbox.qsize() == 3
+        outbox.start()
+        outbox.close(timeout=5)
+        assert sender.sent == [(1, 'первое\n\nвторое'), (2, 'третье')], (
+            'Проверьте, что сообщения одного чата объединяются в одно'
+        )
+        assert outbox.qsize() == 0
+
+    def test_coalescing_respects_message_limit(self):
+        sender = RecordingSender()
+        outbox = TelegramOutbox(None, sender, chat_rate=100)
+        outbox.put(1, 'a' * MESSAGE_LIMIT)
+        outbox.put(1, 'b')
+        outbox.start()
+        outbox.close(timeout=5)
+        assert [text for _, text in sender.sent] == ['a' * MESSAGE_LIMIT, 'b']
+
+    def test_failed_send_is_retried(self):
+        sender = RecordingSender(failures=1)
+        outbox = TelegramOutbox(
+            None, sender, chat_rate=100, retry_backoff=0
+        )
+        outbox.start()
+        outbox.put(1, 'сообщение')
+        assert sender.event.wait(5), (
+            'Проверьте, что неудачная отправка повторяется'
+        )
+        outbox.close(timeout=5)
+        assert sender.sent == [(1, 'сообщение')]
+
+    def test_delivery_outcome_is_reported(self):
+        results = []
+
+        def broken(bot, chat_id, text):
+            if chat_id == 2:
+                raise RuntimeError('непредвиденная ошибка')
+
+        outbox = TelegramOutbox(
+            None, broken, chat_rate=100, max_attempts=2, retry_backoff=0.05
+        ).start()
+        outbox.put(2, 'не дойдет', lambda ok: results.append((2, ok)))
+        outbox.put(1, 'дойдет', lambda ok: results.append((1, ok)))
+        outbox.flush(timeout=5)
+        assert sorted(results) == [(1, True), (2, False)], (
+            'Проверьте, что очередь сообщает о доставке и о сбое, а '
+            'непредвиденная ошибка не останавливает поток отправки'
+        )
+        outbox.put(1, 'после сбоя', lambda ok: results.append((1, ok)))
+        outbox.close(timeout=5)
+        assert results[-1] == (1, True)
+
+
+class TestBufferedOutbox:
+
+    def test_bot_created_only_when_needed(self):
+        bots = []
+
+        def make_bot():
+            bots.append(object())
+            return bots[-1]
+
+        sender = RecordingSender()
+        BufferedOutbox(make_bot, sender).close(timeout=1)
+        assert bots == [], (
+            'Убедитесь, что без сообщений бот Telegram не создается'
+        )
+        outbox = BufferedOutbox(make_bot, sender)
+        outbox.put(1, 'статус изменился')
+        outbox.close(timeout=5)
+        assert len(bots) == 1
+        assert sender.sent == [(1, 'статус изменился')], (
+            'Проверьте, что накопленные сообщения отправляются при закрытии'
+        )
@@ -0,0 +1,63 @@
+import json
+
+import replay
+
+DAY = 24 * 60 * 60
+
+
+def homework(status, name='hw1'):
+    return {'id': 1, 'homework_name': name, 'status': status}
+
+
+class TestReplay:
+
+    def make_records(self):
+        start = 1_600_000_000
+        return [
+            {'current_date': start, 'homeworks': [homework('reviewing')]},
+            {'current_date': start + DAY, 'homeworks': []},
+            {'current_date': start + 2 * DAY,
+             'error': 'NegativStatusCodeError', 'message': 'статус 500'},
+            {'current_date': start + 2 * DAY + 60,
+             'error': 'NegativStatusCodeError', 'message': 'статус 500'},
+            {'current_date': start + 7 * DAY,
+             'homeworks': [homework('approved'), homework('approved')]},
+        ]
+
+    def test_replay_week_of_traffic(self):
+        report = replay.replay(self.make_records())
+        texts = [text for _, _, text in report['log']]
+        assert report['virtual_seconds'] >= 7 * DAY, (
+            'Проверьте, что воспроизведение идет в виртуальном времени'
+        )
+        assert sum('взята на проверку' in text for text in texts) == 1
+        assert sum('ревьюеру всё понравилось' in text for text in texts) == 1, (
+            'Проверьте, что повторный статус не отправляется повторно'
+        )
+        assert sum(text.startswith('Сбой') for text in texts) == 1, (
+            'Проверьте, что о повторяющейся ошибке сообщается один раз'
+        )
+        assert sum(
+            text.startswith('Работа восстановлена') for text in texts
+        ) == 1
+
+    def test_error_does_not_drop_earlier_records(self):
+        start = 1_600_000_000
+        report = replay.replay([
+            {'current_date': start, 'homeworks': [homework('reviewing')]},
+            {'current_date': start + 10,
+             'error': 'NegativStatusCodeError', 'message': 'статус 500'},
+        ], retry_time=60)
+        texts = [text for _, _, text in report['log']]
+        assert sum('взята на проверку' in text for text in texts) == 1, (
+            'Проверьте, что сбой не теряет работы, полученные до него'
+        )
+
+    def test_load_records_sorts_by_date(self, tmp_path):
+        path = tmp_path / 'responses.jsonl'
+        records = self.make_records()
+        path.write_text(
+            '\n'.join(json.dumps(record) for record in reversed(records))
+        )
+        loaded = replay.load_records(path)
+        assert loaded == records
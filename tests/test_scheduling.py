@@ -0,0 +1,73 @@
+import scheduling
+
+
+class TestAdaptiveInterval:
+
+    def make_interval(self):
+        return scheduling.AdaptiveInterval(
+            600, min_interval=60, reviewing_interval=120,
+            max_interval=3600, backoff_factor=2
+        )
+
+    def test_reviewing_polls_faster(self):
+        interval = self.make_interval()
+        homeworks = [{'homework_name': 'hw', 'status': 'reviewing'}]
+        assert interval.update(homeworks) == 120, (
+            'Проверьте, что во время ревью опрос идет чаще'
+        )
+        assert interval.update([]) == 120, (
+            'Проверьте, что пока работа на ревью, интервал не растет'
+        )
+
+    def test_backoff_without_changes(self):
+        interval = self.make_interval()
+        assert interval.update([]) == 1200
+        assert interval.update([]) == 2400
+        assert interval.update([]) == 3600, (
+            'Проверьте, что интервал ограничен сверху'
+        )
+        assert interval.update([]) == 3600
+
+    def test_change_resets_backoff(self):
+        interval = self.make_interval()
+        interval.update([])
+        homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+        assert interval.update(homeworks) == 600, (
+            'Проверьте, что изменение статуса возвращает базовый интервал'
+        )
+
+
+class TestTimingWheel:
+
+    def test_items_fire_at_their_tick(self):
+        wheel = scheduling.TimingWheel(tick=1, size=10, start=0)
+        wheel.schedule('a', 3)
+        wheel.schedule('b', 25)
+        assert wheel.advance(2.5) == []
+        assert wheel.advance(3) == ['a']
+        assert wheel.advance(24) == [], (
+            'Проверьте, что задержки длиннее колеса ждут полных оборотов'
+        )
+        assert wheel.advance(25) == ['b']
+        assert len(wheel) == 0
+
+    def test_reschedule_replaces_previous(self):
+        wheel = scheduling.TimingWheel(tick=1, size=10, start=0)
+        wheel.schedule('a', 2)
+        wheel.schedule('a', 5)
+        assert len(wheel) == 1
+        assert wheel.advance(4) == [], (
+            'Проверьте, что перенос снимает прежнее расписание'
+        )
+        assert wheel.advance(5) == ['a']
+
+    def test_spread_is_even(self):
+        offsets = [
+            scheduling.spread_offset(index, 600, 600) for index in range(600)
+        ]
+        buckets = [0] * 10
+        for offset in offsets:
+            buckets[int(offset // 60)] += 1
+        assert buckets == [60] * 10, (
+            'Проверьте, что первые опросы равномерно разнесены по окну'
+        )
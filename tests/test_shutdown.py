@@ -0,0 +1,52 @@
+import os
+import signal
+import threading
+import time
+
+import shutdown
+from clock import InterruptibleClock
+
+
+class TestShutdown:
+
+    def test_signal_calls_callback_once(self):
+        calls = []
+        previous = signal.getsignal(signal.SIGUSR1)
+        try:
+            shutdown.handle_signals(
+                lambda: calls.append(1), signals=(signal.SIGUSR1,)
+            )
+            os.kill(os.getpid(), signal.SIGUSR1)
+            assert calls == [1], (
+                'Проверьте, что сигнал остановки вызывает обработчик'
+            )
+            assert signal.getsignal(signal.SIGUSR1) == signal.SIG_DFL, (
+                'Проверьте, что повторный сигнал завершает процесс сразу'
+            )
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+
+    def test_steps_share_one_deadline(self):
+        previous = signal.getsignal(signal.SIGUSR1)
+        try:
+            shutdown.handle_signals(lambda: None, signals=(signal.SIGUSR1,))
+            os.kill(os.getpid(), signal.SIGUSR1)
+            deadline = shutdown.shutdown_deadline()
+            time.sleep(0.05)
+            assert shutdown.shutdown_deadline() == deadline
+            assert shutdown.time_left() <= shutdown.SHUTDOWN_TIMEOUT - 0.05, (
+                'Проверьте, что время остановки отсчитывается от сигнала '
+                'и делится между всеми шагами'
+            )
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+
+    def test_interrupt_wakes_sleep(self):
+        clock = InterruptibleClock()
+        threading.Timer(0.05, clock.interrupt).start()
+        started = time.monotonic()
+        clock.sleep(600)
+        assert time.monotonic() - started < 5, (
+            'Проверьте, что остановка будит спящий цикл опроса'
+        )
+        assert clock.interrupted()
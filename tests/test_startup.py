@@ -0,0 +1,10 @@
+from benchmarks import startup
+
+
+class TestStartup:
+
+    def test_homework_defers_heavy_imports(self):
+        assert startup.heavy_imports('homework') == [], (
+            'Убедитесь, что telegram и requests импортируются только '
+            'при первом использовании'
+        )
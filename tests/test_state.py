@@ -0,0 +1,73 @@
+import state
+
+
+class TestStateStore:
+
+    def test_state_survives_restart(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        store = state.StateStore(path)
+        store.save('ivan', 1000, {'1': 'approved'})
+        store.close()
+
+        store = state.StateStore(path)
+        current_date, statuses = store.load('ivan')
+        assert current_date == 1000, (
+            'Проверьте, что курсор восстанавливается после перезапуска'
+        )
+        assert statuses == {'1': 'approved'}, (
+            'Проверьте, что статусы восстанавливаются после перезапуска'
+        )
+        assert store.load('unknown') == (None, {})
+        store.close()
+
+    def test_flush_is_batched(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        store = state.StateStore(path, flush_interval=3600)
+        store.save('ivan', 1000, {})
+        store.flush()
+        reader = state.StateStore(path)
+        assert reader.load('ivan') == (None, {}), (
+            'Проверьте, что запись на диск откладывается до конца интервала'
+        )
+        store.flush(force=True)
+        assert reader.load('ivan') == (1000, {})
+        reader.close()
+        store.close()
+
+    def test_alert_state_survives_restart(self, tmp_path):
+        path = tmp_path / 'state.sqlite3'
+        store = state.StateStore(path)
+        alert = ('NegativStatusCodeError', 'статус 500', 600.0, 1000.0, 2)
+        store.save_alert('ivan', alert)
+        store.close()
+        store = state.StateStore(path)
+        assert store.load_alert('ivan') == alert, (
+            'Проверьте, что состояние уведомлений об ошибке сохраняется'
+        )
+        store.save_alert('ivan', None)
+        store.flush(force=True)
+        assert store.load_alert('ivan') is None
+        store.close()
+
+    def test_subscriptions_indexed_both_ways(self, tmp_path):
+        store = state.StateStore(tmp_path / 'state.sqlite3')
+        store.subscribe('ivan', 1)
+        store.subscribe('ivan', 10, 'mentor')
+        store.subscribe('petr', 10, 'mentor')
+        assert store.subscribers('ivan') == [('1', 'student'),
+                                             ('10', 'mentor')], (
+            'Проверьте, что подписчики учетной записи возвращаются с ролями'
+        )
+        assert store.subscriptions(10) == ['ivan', 'petr'], (
+            'Проверьте, что по чату находятся все его учетные записи'
+        )
+        store.unsubscribe('ivan', 10)
+        assert store.subscriptions(10) == ['petr']
+        plan = store.connection.execute(
+            'EXPLAIN QUERY PLAN '
+            'SELECT account FROM subscriptions WHERE chat_id = ?', ('10',)
+        ).fetchall()
+        assert 'subscriptions_by_chat' in str(plan), (
+            'Проверьте, что поиск по чату использует индекс'
+        )
+        store.close()
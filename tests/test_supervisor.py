@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+import supervisor
+
+
+def crashing_worker(worker_id, names, control, health, workers):
+    if worker_id == 0:
+        return
+    while control.get() is not None:
+        pass
+
+
+class TestHashRing:
+
+    def test_partition_is_balanced(self):
+        ring = supervisor.HashRing(range(4))
+        partition = ring.partition(str(index) for index in range(4000))
+        sizes = [len(partition[node]) for node in range(4)]
+        assert min(sizes) > 700 and max(sizes) < 1300, (
+            'Проверьте, что учетные записи делятся между процессами '
+            'примерно поровну'
+        )
+
+    def test_removal_moves_only_own_keys(self):
+        ring = supervisor.HashRing(range(4))
+        keys = [str(index) for index in range(1000)]
+        before = {key: ring.node_for(key) for key in keys}
+        ring.remove(2)
+        moved = [key for key in keys if ring.node_for(key) != before[key]]
+        assert moved and all(before[key] == 2 for key in moved), (
+            'Проверьте, что при удалении процесса переезжают только его '
+            'учетные записи'
+        )
+
+
+class TestSupervisor:
+
+    def test_dead_worker_accounts_are_rebalanced(self):
+        names = [str(index) for index in range(50)]
+        manager = supervisor.Supervisor(
+            names, workers=2, target=crashing_worker, restart_delay=60
+        )
+        thread = threading.Thread(
+            target=manager.run, kwargs={'check_interval': 0.05}
+        )
+        thread.start()
+        try:
+            deadline = time.monotonic() + 10
+            while (0 in manager.workers or not manager.workers
+                   or not manager._restart_at):
+                assert time.monotonic() < deadline, (
+                    'Супервизор не заметил упавший процесс'
+                )
+                time.sleep(0.05)
+            assert sorted(manager.workers[1].names) == sorted(names), (
+                'Проверьте, что учетные записи упавшего процесса '
+                'передаются живым процессам'
+            )
+            assert manager.health()['alive'] == 1
+        finally:
+            manager.stop()
+            thread.join(30)
+        assert not thread.is_alive()
+
+    def test_handoff_waits_for_release(self):
+        names = [str(index) for index in range(50)]
+        manager = supervisor.Supervisor(names, workers=2)
+        manager._reports = queue.Queue()
+        manager.ring.remove(1)
+        for worker_id in range(2):
+            manager.workers[worker_id] = supervisor.Worker(
+                worker_id, SimpleNamespace(is_alive=lambda: True),
+                queue.Queue(), names if worker_id == 0 else []
+            )
+        manager.ring.add(1)
+        manager._rebalance()
+        moved = manager.ring.partition(names)[1]
+        assert manager.workers[1].control.empty(), (
+            'Проверьте, что учетные записи не назначаются новому '
+            'процессу, пока старый не подтвердил их передачу'
+        )
+        assert not set(moved) & set(manager.workers[0].control.get())
+        manager._reports.put({'worker': 0, 'released': moved})
+        manager._collect_health()
+        assert manager.workers[1].control.get() == moved, (
+            'Проверьте, что после подтверждения учетные записи '
+            'назначаются новому владельцу'
+        )
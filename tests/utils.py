@@ -37,3 +37,10 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+
+def session_get(fake):
+    """Метод Session.get, передающий запросы функции fake(url, **kwargs)."""
+    def get(self, url, **kwargs):
+        return fake(url, **kwargs)
+    return get